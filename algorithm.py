@@ -1,5 +1,4 @@
-import pandas as pd
-
+from metrics import timed
 
 # Example flavor_pairings dictionary
 flavor_pairings = {
@@ -10,79 +9,143 @@ flavor_pairings = {
     'umami': {'Flavor_profile_similar': ['salty', 'umami'], 'Flavor_profile_contrast': ['sweet', 'sour']}
 }
 
-# Load your data
-df = pd.read_csv('test4.csv')
-
-
-df.rename(columns={'Taste (if app)': 'Taste', 'Function (if app)': 'Function'}, inplace=True)
-
-# Normalize text formatting
-df['Ingredient'] = df['Ingredient'].str.lower().str.strip()
-df['Taste'] = df['Taste'].str.lower().str.replace('"', '').str.strip()
-df['Pairings'] = df['Pairings'].str.lower().str.replace('"', '').str.strip()
-
-# Debugging
-print(df.head())
-
 
-user_choice = input("Pair ingredients choice: 1 for similar, 2 for contrast, 3 for all pairings: ")
-user_ingredient = input("Enter ingredient: ").lower().strip()
-
-# Find the row for the user's chosen ingredient
-user_row = df.loc[df['Ingredient'] == user_ingredient]
+@timed('csv_load_seconds', source='pandas')
+def load_dataset(path='test4.csv'):
+    """
+    Loads an ingredient CSV and normalizes the text columns
+    (lowercase, no quotes, no surrounding whitespace).
+    """
+    import pandas as pd
+
+    df = pd.read_csv(path)
+
+    df.rename(columns={'Taste (if app)': 'Taste', 'Function (if app)': 'Function'}, inplace=True)
+
+    # Normalize text formatting
+    df['Ingredient'] = df['Ingredient'].str.lower().str.strip()
+    df['Taste'] = df['Taste'].str.lower().str.replace('"', '').str.strip()
+    df['Pairings'] = df['Pairings'].str.lower().str.replace('"', '').str.strip()
+    return df
+
+
+def split_list(value):
+    """Splits a comma-separated cell into a list of stripped, non-empty items."""
+    if not isinstance(value, str):  # Missing cells come back from pandas as NaN
+        return []
+    return [item.strip() for item in str(value).split(',') if item.strip()]
+
+
+def build_ingredient_index(df):
+    """
+    Builds a lookup table from each normalized ingredient to its tastes and pairings.
+
+    The index is built once at load time so every later lookup is a dict access
+    instead of a scan over the whole DataFrame. Like the old `.values[0]` lookups,
+    the first row wins if an ingredient appears more than once.
+    """
+    index = {}
+    for ingredient, taste_str, pairings_str in zip(df['Ingredient'], df['Taste'], df['Pairings']):
+        if not isinstance(ingredient, str) or ingredient in index:
+            continue
+        index[ingredient] = {
+            'tastes': tuple(split_list(taste_str)),
+            'pairings': split_list(pairings_str),
+        }
+    return index
+
+
+def target_flavors_for(tastes, choice):
+    """
+    Collects the tastes that count as a match for the given tastes.
+    choice is '1' for similar and '2' for contrast.
+    Returns the target set and the list of tastes missing from flavor_pairings.
+    """
+    flavor_key = 'Flavor_profile_similar' if choice == '1' else 'Flavor_profile_contrast'
+    target_flavors = set()
+    unknown = []
+    for t in tastes:
+        if t in flavor_pairings:
+            target_flavors.update(flavor_pairings[t][flavor_key])
+        else:
+            unknown.append(t)
+    return target_flavors, unknown
+
+
+@timed('lookup_seconds', kind='filter_pairings')
+def filter_pairings(index, ingredient, choice):
+    """
+    Returns the pairings of `ingredient` that match the user's flavor choice
+    ('1' similar, '2' contrast, '3' all pairings).
+
+    Returns None if the ingredient is not in the index. Pairings that are not
+    themselves in the index are skipped for similar/contrast, as before.
+    """
+    entry = index.get(ingredient.lower().strip())
+    if entry is None:
+        return None
+    if choice == '3':
+        return list(entry['pairings'])
+
+    target_flavors, _ = target_flavors_for(entry['tastes'], choice)
+    valid_pairings = []
+    for p_ing in entry['pairings']:
+        paired = index.get(p_ing)
+        if paired is not None and not target_flavors.isdisjoint(paired['tastes']):
+            valid_pairings.append(p_ing)
+    return valid_pairings
+
+
+def main():
+    from dataset import get_answer_cache, get_index, get_resolver
+
+    # Memory-mapped index, compiled from the CSV on first use
+    index = get_index('test4.csv')
+
+    user_choice = input("Pair ingredients choice: 1 for similar, 2 for contrast, 3 for all pairings: ").strip()
+    if user_choice not in ('1', '2', '3'):
+        print(f"Invalid choice '{user_choice}'. Please enter 1, 2 or 3.")
+        return
+    user_ingredient = input("Enter ingredient: ").lower().strip()
+
+    # Find the entry for the user's chosen ingredient, allowing plurals, word order and typos
+    match, how = get_resolver('test4.csv').resolve(user_ingredient)
+    if match is None:
+        print(f"No matching ingredient found for '{user_ingredient}'. Please check spelling.")
+        return
+    if how != 'exact':
+        print(f"Using '{match}' for '{user_ingredient}'.")
+    user_ingredient = match
+    entry = index.get(user_ingredient)
+
+    if not entry['pairings']:
+        print(f"No pairings found for '{user_ingredient}'.")
+        return
 
-if user_row.empty:
-    print(f"No matching ingredient found for '{user_ingredient}'. Please check spelling.")
-else:
     if user_choice == '3':
         print(f"Pairings for '{user_ingredient}':")
-        print(user_row['Pairings'].values[0])
-    else:
+        print(", ".join(get_answer_cache('test4.csv').get(user_ingredient, '3')))
+        return
 
-        # Get the user's ingredient taste(s)
-        user_taste_str = user_row['Taste'].values[0]  
-        user_tastes = [t.strip() for t in user_taste_str.split(',')]
+    _, unknown = target_flavors_for(entry['tastes'], user_choice)
+    if unknown:
+        print(f"Warning: taste(s) {', '.join(unknown)} not found in flavor_pairings. Skipping...")
 
-        # Determine whether to look up similar or contrast
-        flavor_key = 'Flavor_profile_similar' if user_choice == '1' else 'Flavor_profile_contrast'
+    missing = [p_ing for p_ing in entry['pairings'] if p_ing not in index]
+    if missing:
+        print(f"Warning: {len(missing)} pairing(s) not found in dataset: {', '.join(missing)}")
 
-        # Collect a set of target flavors from flavor_pairings
-        target_flavors = set()
-        for t in user_tastes:
-            if t in flavor_pairings:
-                target_flavors.update(flavor_pairings[t][flavor_key])
-            else:
-                print(f"Warning: taste '{t}' not found in flavor_pairings. Skipping...")
+    # Served from the precomputed answer table
+    valid_pairings = get_answer_cache('test4.csv').get(user_ingredient, user_choice)
 
-        # Parse the "Pairings" column from the chosen ingredient
-        pairings_str = user_row['Pairings'].values[0]
+    # Print out the result
+    if not valid_pairings:
+        print(f"No valid pairings found for '{user_ingredient}' based on your flavor choice.")
+    else:
+        print(f"Ingredients paired with '{user_ingredient}' that match your flavor criteria:")
+        for vp in valid_pairings:
+            print(f" - {vp}")
 
-        # Handle case where pairings are missing
-        if pd.isna(pairings_str) or not pairings_str.strip():
-            print(f"No pairings found for '{user_ingredient}'.")
-        else:
-            # Turn the pairings into a list of ingredients
-            pairing_list = [p.strip() for p in pairings_str.split(',')]
-
-            # Check if the paired ingredients exist in df
-            valid_pairings = []
-            for p_ing in pairing_list:
-                match_row = df.loc[df['Ingredient'] == p_ing]  # find a row with that ingredient
-                if not match_row.empty:
-                    # Retrieve taste(s) for that paired ingredient
-                    paired_taste_str = match_row['Taste'].values[0]
-                    paired_tastes = [pt.strip() for pt in paired_taste_str.split(',')]
-                    
-                    # If any of the paired_tastes intersect with target_flavors, keep it
-                    if any(taste in target_flavors for taste in paired_tastes):
-                        valid_pairings.append(p_ing)
-                else:
-                    print(f"Warning: '{p_ing}' from pairings not found in dataset.")
-
-            # Print out the result
-            if not valid_pairings:
-                print(f"No valid pairings found for '{user_ingredient}' based on your flavor choice.")
-            else:
-                print(f"Ingredients paired with '{user_ingredient}' that match your flavor criteria:")
-                for vp in valid_pairings:
-                    print(f" - {vp}")
\ No newline at end of file
+
+if __name__ == "__main__":
+    main()
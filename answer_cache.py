@@ -0,0 +1,208 @@
+"""
+Precomputed answers for algorithm.py's three query types.
+
+The answer to "pairings of X that are similar (1) / contrasting (2) / all (3)"
+depends only on the dataset and X, so every answer is computed once, in bulk,
+and saved next to the CSV as a compact binary table:
+
+    header         magic, format version, node count, source fingerprint, section offsets
+    per choice     offsets[n_nodes + 1] and answers[...] as uint32 ids into the
+                   compiled graph's name table (see pairing_graph.py)
+
+The table is memory-mapped. An in-memory LRU of decoded answers sits in front
+of it. Both are rebuilt when the source CSV's size or mtime no longer match
+the fingerprint in the table, which is checked at most every check_interval
+seconds. A rebuild swaps the graph and table in together, so concurrent
+lookups keep using the old pair until the new one is complete.
+"""
+import functools
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+from atomic_file import write_atomic
+from metrics import inc
+from pairing_graph import load_graph, source_fingerprint
+from taste_mask import TasteFilter
+
+MAGIC = b'PANS'
+FORMAT_VERSION = 1
+CHOICES = ('1', '2', '3')
+
+# magic, version, n_nodes, source size, source mtime_ns, offsets/answers section offsets per choice
+HEADER = struct.Struct('<4sIIqq6Q')
+
+
+def default_table_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.answers'
+
+
+def compute_answers(graph):
+    """
+    {choice: (offsets, ids)} for every ingredient in the graph, with the same
+    answers as algorithm.filter_pairings. Ingredients without a row get an empty answer.
+    """
+    taste_filter = TasteFilter(graph)
+    answers = {}
+    # Edges are grouped by ingredient, so keeping a subset keeps the grouping
+    sources = np.repeat(np.arange(len(graph.names)), np.diff(graph.row_offsets.astype(np.int64)))
+    for choice in ('1', '2'):
+        keep = taste_filter.edge_mask(choice)
+        offsets = np.zeros(len(graph.names) + 1, dtype=np.uint32)
+        np.cumsum(np.bincount(sources[keep], minlength=len(graph.names)), out=offsets[1:])
+        answers[choice] = (offsets, graph.neighbors[keep].astype(np.uint32))
+    answers['3'] = (graph.row_offsets.astype(np.uint32), graph.neighbors.astype(np.uint32))
+    return answers
+
+
+def write_table(graph, table_path):
+    """Computes every answer for the graph and writes the table, stamped with the graph's source fingerprint."""
+    answers = compute_answers(graph)
+    body = bytearray()
+    section_offsets = []
+    for choice in CHOICES:
+        for array in answers[choice]:
+            body.extend(b'\0' * (-len(body) % 8))
+            section_offsets.append(HEADER.size + len(body))
+            body.extend(array.tobytes())
+    size, mtime_ns = graph.source_fingerprint
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(graph.names), size, mtime_ns, *section_offsets)
+
+    write_atomic(table_path, header, body)
+
+
+class AnswerTable:
+    """A memory-mapped answer table: answer_ids(node_id, choice) -> array of name ids."""
+
+    def __init__(self, table_path):
+        with open(table_path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = HEADER.unpack_from(self._mmap, 0)
+        magic, version, n_nodes, size, mtime_ns = header[:5]
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"'{table_path}' is not a version {FORMAT_VERSION} answer table.")
+        self.source_fingerprint = (size, mtime_ns)
+        self.n_nodes = n_nodes
+        self._sections = {}
+        section_offsets = header[5:]
+        for k, choice in enumerate(CHOICES):
+            offsets_at, ids_at = section_offsets[2 * k], section_offsets[2 * k + 1]
+            offsets = np.frombuffer(self._mmap, np.uint32, n_nodes + 1, offsets_at)
+            ids = np.frombuffer(self._mmap, np.uint32, int(offsets[-1]), ids_at)
+            self._sections[choice] = (offsets, ids)
+
+    def answer_ids(self, i, choice):
+        offsets, ids = self._sections[choice]
+        return ids[offsets[i]:offsets[i + 1]]
+
+
+class AnswerCache:
+    """
+    Serves filter_pairings-style answers from the precomputed table, with an LRU
+    of decoded answers in front. Answers are tuples, shared between callers.
+    """
+
+    def __init__(self, csv_path='test4.csv', table_path=None, lru_size=4096, check_interval=1.0):
+        self.csv_path = csv_path
+        self.table_path = table_path or default_table_path(csv_path)
+        self.check_interval = check_interval
+        self._cached_answer = functools.lru_cache(maxsize=lru_size)(self._answer)
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._state = None  # (graph, table), always replaced together
+        self._load()
+
+    @property
+    def graph(self):
+        return self._state[0]
+
+    @property
+    def table(self):
+        return self._state[1]
+
+    def _load(self):
+        """Maps the graph and the table, (re)building the table if it is missing, corrupt or stale."""
+        graph = load_graph(self.csv_path)
+        table = None
+        if os.path.exists(self.table_path):
+            try:
+                table = AnswerTable(self.table_path)
+            except (ValueError, struct.error):
+                table = None
+        if table is None or table.source_fingerprint != graph.source_fingerprint \
+                or table.n_nodes != len(graph.names):
+            write_table(graph, self.table_path)
+            table = AnswerTable(self.table_path)
+            inc('answer_table_builds_total')
+        with self._lock:
+            self._state = (graph, table)
+            self._cached_answer.cache_clear()
+            self._last_check = time.monotonic()
+
+    def _check_source(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            if now - self._last_check < self.check_interval:
+                return  # Another thread checked while we waited
+            self._last_check = now
+            stale = os.path.exists(self.csv_path) and \
+                source_fingerprint(self.csv_path) != self._state[1].source_fingerprint
+        if stale:
+            self._load()
+
+    def _answer(self, state, ingredient, choice):
+        graph, table = state
+        i = graph.node_id(ingredient)
+        if i is None or not graph.has_row[i]:
+            return None
+        names = graph.names
+        return tuple(names[j] for j in table.answer_ids(i, choice))
+
+    def get(self, ingredient, choice):
+        """
+        Same answer as algorithm.filter_pairings(index, ingredient, choice), as a
+        tuple. None if the ingredient is unknown or the choice isn't 1, 2 or 3.
+        """
+        if choice not in CHOICES:
+            return None
+        self._check_source()
+        # The graph and table are read as one pair, and the pair is part of the LRU
+        # key, so an answer decoded during a reload never mixes old and new data
+        return self._cached_answer(self._state, ingredient.lower().strip(), choice)
+
+    def stats(self):
+        info = self._cached_answer.cache_info()
+        return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'max_size': info.maxsize}
+
+
+if __name__ == "__main__":
+    from algorithm import filter_pairings
+
+    path = sys.argv[1] if len(sys.argv) > 1 else 'test4.csv'
+    t0 = time.perf_counter()
+    cache = AnswerCache(path)
+    print(f"Answer table for {path} ready in {(time.perf_counter() - t0) * 1000:.1f}ms "
+          f"({os.path.getsize(cache.table_path)} bytes)")
+
+    graph = load_graph(path)
+    ingredients = list(graph.ingredients())
+    for choice in CHOICES:
+        assert all(list(cache.get(n, choice)) == filter_pairings(graph, n, choice) for n in ingredients)
+
+    for label, func in (("filter_pairings", lambda n, c: filter_pairings(graph, n, c)),
+                        ("answer cache", cache.get)):
+        t0 = time.perf_counter()
+        for _ in range(10):
+            for choice in CHOICES:
+                for name in ingredients:
+                    func(name, choice)
+        per_query = (time.perf_counter() - t0) / (10 * len(CHOICES) * max(len(ingredients), 1))
+        print(f"  {label}: {per_query * 1e6:.1f}us per query")
+    print(f"  LRU: {cache.stats()}")
@@ -1,12 +1,12 @@
 import requests
 from dotenv import load_dotenv
 import os
-from algorithm import *
+from spoonacular_client import get_default_client
 
 # Load .env file
 load_dotenv()
 API_KEY = os.environ.get("API_KEY")
-BASE_URL = "https://api.spoonacular.com"
+BASE_URL = os.environ.get("SPOONACULAR_BASE_URL", "https://api.spoonacular.com")
 
 def search_recipes_by_query(api_key, query, ingredients=None, number=1):
     """
@@ -31,9 +31,7 @@ def search_recipes_by_query(api_key, query, ingredients=None, number=1):
     if ingredients:
         params["includeIngredients"] = ingredients
     
-    response = requests.get(endpoint, params=params)
-    response.raise_for_status()  # Raises an HTTPError if the status isn't 200
-    return response.json()
+    return get_default_client().get_json(endpoint, params)  # Raises an HTTPError if the status isn't 200
 
 def search_recipes_by_ingredients(api_key, ingredients, number=1):
     """
@@ -58,9 +56,7 @@ def search_recipes_by_ingredients(api_key, ingredients, number=1):
         "number": number
     }
     
-    response = requests.get(endpoint, params=params)
-    response.raise_for_status()  # Raises an HTTPError if the status isn't 200
-    return response.json()
+    return get_default_client().get_json(endpoint, params)  # Raises an HTTPError if the status isn't 200
 
 def print_complex_search_result(data):
     
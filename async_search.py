@@ -0,0 +1,112 @@
+"""
+Asyncio fan-out for the recipe searches in combination.py.
+
+The blocking search functions run on a thread pool sized to the concurrency
+limit, all sharing the pooled client from spoonacular_client.py, so a batch of
+searches takes roughly one round trip per `concurrency` searches instead of
+one per search. Results come back in input order. A failed search returns its
+exception in place of a result, so one bad request doesn't sink the batch.
+
+Run this module directly to measure throughput against spoonacular_stub.py.
+"""
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from combination import (API_KEY, fetch_coalesced_async, ingredients_request, query_request,
+                         search_recipes_by_ingredients, search_recipes_by_query)
+
+DEFAULT_CONCURRENCY = 10
+
+
+async def _run(executor, semaphore, func, kwargs):
+    async with semaphore:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, functools.partial(func, **kwargs))
+        except Exception as e:
+            return e
+
+
+async def run_searches(calls, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Runs [(search_function, kwargs), ...] concurrently, at most `concurrency` at a time.
+    Returns results in input order, with an exception object in place of any failed search.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return await asyncio.gather(*(_run(executor, semaphore, func, kwargs) for func, kwargs in calls))
+
+
+async def search_recipes_by_query_async(api_key, query, ingredients=None, number=1):
+    """Async variant of search_recipes_by_query. Joins an identical search already in flight."""
+    return await fetch_coalesced_async(*query_request(api_key, query, ingredients, number))
+
+
+async def search_recipes_by_ingredients_async(api_key, ingredients, number=1):
+    """Async variant of search_recipes_by_ingredients. Joins an identical search already in flight."""
+    return await fetch_coalesced_async(*ingredients_request(api_key, ingredients, number))
+
+
+async def search_many_by_query(api_key, queries, number=1, concurrency=DEFAULT_CONCURRENCY):
+    """complexSearch for each query (a string, or a (query, ingredients) pair), in input order."""
+    calls = []
+    for q in queries:
+        query, ingredients = (q, None) if isinstance(q, str) else q
+        calls.append((search_recipes_by_query,
+                      dict(api_key=api_key, query=query, ingredients=ingredients, number=number)))
+    return await run_searches(calls, concurrency)
+
+
+async def search_many_by_ingredients(api_key, ingredient_sets, number=1, concurrency=DEFAULT_CONCURRENCY):
+    """findByIngredients for each ingredient set, in input order."""
+    calls = [(search_recipes_by_ingredients, dict(api_key=api_key, ingredients=ingredients, number=number))
+             for ingredients in ingredient_sets]
+    return await run_searches(calls, concurrency)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import combination
+    from spoonacular_client import SpoonacularClient, set_default_client
+    from spoonacular_stub import PANTRY, start_stub
+
+    parser = argparse.ArgumentParser(description="Measure concurrent search throughput against the local stub")
+    parser.add_argument("--searches", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.1, help="stub latency in seconds")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    args = parser.parse_args()
+
+    stub = start_stub(latency=args.latency)
+    set_default_client(SpoonacularClient(base_url=stub.base_url, rate=0, cache=None,
+                                         pool_size=args.concurrency))
+    combination.BASE_URL = stub.base_url  # The search functions build their URLs from this
+    ingredient_sets = [",".join(PANTRY[i % len(PANTRY):i % len(PANTRY) + 3]) for i in range(args.searches)]
+    api_key = API_KEY or "stub"
+
+    t0 = time.perf_counter()
+    for ingredients in ingredient_sets:
+        search_recipes_by_ingredients(api_key, ingredients)
+    serial = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    results = asyncio.run(search_many_by_ingredients(api_key, ingredient_sets, concurrency=args.concurrency))
+    concurrent = time.perf_counter() - t0
+
+    errors = sum(isinstance(r, Exception) for r in results)
+    print(f"{args.searches} searches at {args.latency * 1000:.0f}ms latency: "
+          f"serial {serial:.2f}s ({args.searches / serial:.1f}/s), "
+          f"concurrency {args.concurrency} {concurrent:.2f}s ({args.searches / concurrent:.1f}/s), "
+          f"{errors} errors")
+
+    # The same search issued by many tasks at once goes out once
+    async def duplicates():
+        return await asyncio.gather(*(search_recipes_by_ingredients_async(api_key, ingredient_sets[0])
+                                      for _ in range(args.searches)))
+
+    before = stub.request_count
+    asyncio.run(duplicates())
+    print(f"{args.searches} identical concurrent searches sent {stub.request_count - before} request(s); "
+          f"coalescing so far: {combination.SEARCH_FLIGHT.stats()}")
@@ -0,0 +1,24 @@
+"""
+Crash-safe file writes.
+
+The data goes to a temporary file next to the target, named after the process
+so parallel writers don't collide, which is then renamed over the target. A
+reader sees either the old file or the complete new one, never a half-written
+file, and an interrupted write leaves the target untouched.
+"""
+import os
+
+
+def write_atomic(path, *parts):
+    """Writes the parts (all bytes, or all str as UTF-8) to path, replacing it in one step."""
+    binary = not parts or isinstance(parts[0], (bytes, bytearray, memoryview))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb' if binary else 'w', encoding=None if binary else 'utf-8') as f:
+            for part in parts:
+                f.write(part)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,159 @@
+"""
+Non-interactive batch runner.
+
+Reads jobs from a JSONL file (or stdin), one JSON object per line, runs them
+against one preloaded pairing index and one shared Spoonacular client, and
+writes one JSON result per line as each job finishes:
+
+    {"id": 1, "op": "pairings", "ingredient": "honey"}
+    {"id": 2, "op": "filter", "ingredient": "ginger", "mode": "contrast"}
+    {"id": 3, "op": "complexSearch", "query": "pasta", "ingredients": "tomato", "number": 2}
+    {"id": 4, "op": "findByIngredients", "ingredients": "apple, honey", "number": 5}
+
+    python batch.py jobs.jsonl --output results.jsonl
+    python batch.py jobs.jsonl --dataset all          # every bundled CSV, merged (see ingredient_store.py)
+
+Every result carries the job's id and op, "ok", either "result" or "error",
+and "elapsed_ms" for the job itself.
+"""
+import argparse
+import json
+import sys
+import time
+
+import requests
+
+from algorithm import filter_pairings
+from combination import API_KEY, search_recipes_by_ingredients, search_recipes_by_query
+from dataset import ALL_SOURCES, get_index, get_store, get_taste_filter
+
+# "mode" for filter jobs, mapped to algorithm.py's menu choices
+FILTER_MODES = {'similar': '1', 'contrast': '2', 'all': '3', '1': '1', '2': '2', '3': '3'}
+
+
+class JobError(Exception):
+    """A job that can't be run as written (unknown op, missing field, unknown ingredient)."""
+
+
+def _required(job, field):
+    if job.get(field) in (None, ''):
+        raise JobError(f"'{job.get('op')}' jobs need a '{field}' field.")
+    return job[field]
+
+
+def _text(job, field, required=True):
+    """A string field, or None if it's optional and missing."""
+    value = _required(job, field) if required else job.get(field)
+    if value is not None and not isinstance(value, str):
+        raise JobError(f"'{field}' must be a string.")
+    return value
+
+
+def _ingredient_list(job, field, required=True):
+    """A comma-separated string, also accepted as a list of strings."""
+    value = _required(job, field) if required else job.get(field)
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return ",".join(value)
+    if value is not None and not isinstance(value, str):
+        raise JobError(f"'{field}' must be a string or a list of strings.")
+    return value
+
+
+def _number(job):
+    value = job.get('number', 1)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise JobError("'number' must be a positive integer.")
+    return value
+
+
+def run_job(job, index, api_key, taste_filter=None):
+    """
+    Runs a single job and returns its result. Raises JobError or a requests exception on failure.
+    Similar/contrast filters use taste_filter (a taste_mask.TasteFilter over index) when given.
+    """
+    op = job.get('op')
+    if op == 'pairings':
+        mode = '3'
+    elif op == 'filter':
+        mode = FILTER_MODES.get(str(job.get('mode', 'similar')).lower())
+        if mode is None:
+            raise JobError(f"Unknown filter mode '{job.get('mode')}'.")
+    elif op == 'complexSearch':
+        return search_recipes_by_query(api_key, _text(job, 'query'), _ingredient_list(job, 'ingredients', False),
+                                       _number(job))
+    elif op == 'findByIngredients':
+        return search_recipes_by_ingredients(api_key, _ingredient_list(job, 'ingredients'), _number(job))
+    else:
+        raise JobError(f"Unknown op '{op}'.")
+
+    ingredient = _text(job, 'ingredient')
+    if taste_filter is not None and mode != '3':
+        result = taste_filter.filter(ingredient, mode)
+    else:
+        result = filter_pairings(index, ingredient, mode)
+    if result is None:
+        raise JobError(f"No matching ingredient found for '{ingredient.lower().strip()}'.")
+    return result
+
+
+def run_batch(lines, out, index, api_key, taste_filter=None):
+    """Runs every job in `lines` and writes JSONL results to `out`. Returns (jobs, failures)."""
+    jobs = failures = 0
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        jobs += 1
+        t0 = time.perf_counter()
+        record = {}
+        try:
+            job = json.loads(line)
+            if not isinstance(job, dict):
+                raise JobError("Each line must be a JSON object.")
+            record = {'id': job.get('id', line_no), 'op': job.get('op')}
+            result = run_job(job, index, api_key, taste_filter)
+            record['ok'] = True
+            record['result'] = result
+        except (json.JSONDecodeError, JobError, requests.exceptions.RequestException) as e:
+            record.setdefault('id', line_no)
+            record['ok'] = False
+            record['error'] = str(e)
+            failures += 1
+        except Exception as e:  # An unexpected bug in one job still shouldn't stop the run
+            record.setdefault('id', line_no)
+            record['ok'] = False
+            record['error'] = f"{type(e).__name__}: {e}"
+            failures += 1
+        record['elapsed_ms'] = round((time.perf_counter() - t0) * 1000, 3)
+        out.write(json.dumps(record) + "\n")
+    return jobs, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run pairing lookups and recipe searches from a JSONL file")
+    parser.add_argument("jobs", nargs='?', default='-', help="JSONL job file, or - for stdin")
+    parser.add_argument("--output", default='-', help="JSONL result file, or - for stdout")
+    parser.add_argument("--dataset", default='test4.csv',
+                        help=f"ingredient CSV, or '{ALL_SOURCES}' for every bundled source merged")
+    args = parser.parse_args()
+
+    if args.dataset == ALL_SOURCES:
+        # The store re-reads edited sources as it goes, which a prebuilt TasteFilter wouldn't see
+        index, taste_filter = get_store(), None
+    else:
+        index, taste_filter = get_index(args.dataset), get_taste_filter(args.dataset)
+    jobs_in = sys.stdin if args.jobs == '-' else open(args.jobs, encoding='utf-8')
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    t0 = time.perf_counter()
+    try:
+        jobs, failures = run_batch(jobs_in, out, index, API_KEY, taste_filter)
+    finally:
+        if jobs_in is not sys.stdin:
+            jobs_in.close()
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - t0
+    print(f"{jobs} jobs, {failures} failed, {elapsed:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
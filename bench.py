@@ -0,0 +1,308 @@
+"""
+Benchmark suite on synthetic data.
+
+Generates test4.csv-shaped ingredient CSVs and Flavor Bible-shaped page line
+streams at the requested sizes, runs timed scenarios over them and writes one
+JSON results file, so runs on different commits can be compared:
+
+    python bench.py                                   # 1k and 100k rows
+    python bench.py --sizes 1000,100000,1000000 --output results.json
+    python bench.py --compare old.json                # flags scenarios that got slower
+
+Scenarios, each timed as the best of --repeat runs:
+
+    load_pandas      algorithm.load_dataset
+    compile_graph    pairing_graph.compile_graph (CSV -> binary graph)
+    open_graph       memory-mapping the compiled graph
+    lookup           PairingGraph.get for LOOKUPS random ingredients
+    filter_dict      algorithm.filter_pairings (similar) for LOOKUPS random ingredients
+    filter_all       taste_mask.TasteFilter.filter_all (similar) over every ingredient
+    similarity       similarity.top_k_similar over every ingredient
+    classify         pdf.classify over the line stream, split into rows as pdf.page_rows does
+    classify_stream  pdf.iter_tidy_rows over the same pages, page by page
+
+Scenarios listed in MAX_ROWS are skipped above that many rows. Data is only
+generated for the scenarios that actually run.
+"""
+import argparse
+import csv
+import functools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from algorithm import flavor_pairings
+
+DEFAULT_SIZES = [1_000, 100_000]
+LOOKUPS = 10_000
+MAX_ROWS = {'similarity': 100_000}
+
+# Column vocabularies for the synthetic CSV, shaped like test4.csv
+TASTES = list(flavor_pairings) + ['astringent', 'pungent']  # Plus a couple outside flavor_pairings
+FUNCTIONS = ['heating', 'cooling', 'neutral']
+WEIGHTS = ['light', 'medium', 'heavy', 'dry']
+VOLUMES = ['quiet', 'moderate', 'loud']
+
+
+def ingredient_names(n):
+    return [f"ingredient {i}" for i in range(n)]
+
+
+def write_synthetic_csv(path, n_rows, pairings_per_row=12, missing_share=0.1, seed=0):
+    """
+    Writes an n_rows test4.csv-style CSV. Each row pairs with pairings_per_row
+    other ingredients; a missing_share of those have no row of their own, as in
+    the real data.
+    """
+    rng = random.Random(seed)
+    names = ingredient_names(n_rows)
+    extra = [f"unlisted {i}" for i in range(max(1, int(n_rows * missing_share)))]
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Ingredient', 'Taste (if app)', 'Function (if app)', 'Weight', 'Volume', 'Pairings'])
+        for name in names:
+            pairings = [rng.choice(extra) if rng.random() < missing_share else rng.choice(names)
+                        for _ in range(pairings_per_row)]
+            writer.writerow([
+                name.upper(),
+                ", ".join(rng.sample(TASTES, rng.randint(1, 2))),
+                rng.choice(FUNCTIONS),
+                ", ".join(rng.sample(WEIGHTS, rng.randint(1, 2))),
+                ", ".join(rng.sample(VOLUMES, rng.randint(1, 2))),
+                ", ".join(p.upper() for p in dict.fromkeys(pairings) if p != name),
+            ])
+    return names
+
+
+def synthetic_flavor_lines(n_lines, lines_per_page=40, seed=0):
+    """
+    (Page, Text) rows shaped like pdf.extract_pages output: uppercase headings
+    followed by lowercase pairing lines, with the odd quote (pronouns), dashed
+    line and page of indented pairings mixed in.
+    """
+    rng = random.Random(seed)
+    rows = []
+    heading = 0
+    page = 0
+    while len(rows) < n_lines:
+        indented = rng.random() < 0.2
+        for _ in range(min(lines_per_page, n_lines - len(rows))):
+            r = rng.random()
+            if r < 0.08:
+                heading += 1
+                text = f"INGREDIENT {heading}"
+            elif r < 0.11:
+                text = "We love this with a squeeze of lemon."
+            elif r < 0.13:
+                text = f"-- chef {rng.randint(1, 500)}"
+            else:
+                text = f"ingredient {rng.randint(0, 5000)}"
+                if indented:
+                    text = " " + text
+            rows.append((page + 1, text))
+        page += 1
+    return rows
+
+
+def page_texts(rows):
+    """Regroups (Page, Text) rows into (page_num, text) pairs for pdf.iter_tidy_rows."""
+    pages = {}
+    for page, text in rows:
+        pages.setdefault(page - 1, []).append(text)
+    return [(num, "\n".join(lines)) for num, lines in pages.items()]
+
+
+def best_of(repeat, func):
+    """Runs func repeat times and returns (best seconds, last result)."""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+class ScenarioData:
+    """The synthetic inputs for one size, each generated the first time a scenario asks for it."""
+
+    def __init__(self, size, data_dir, seed):
+        self.size = size
+        self.seed = seed
+        self.csv_path = os.path.join(data_dir, f"synthetic_{size}.csv")
+        self.graph_path = os.path.join(data_dir, f"synthetic_{size}.pgraph")
+
+    @functools.cached_property
+    def names(self):
+        return write_synthetic_csv(self.csv_path, self.size, seed=self.seed)
+
+    @functools.cached_property
+    def sample(self):
+        rng = random.Random(self.seed)
+        return [rng.choice(self.names) for _ in range(LOOKUPS)]
+
+    @functools.cached_property
+    def graph(self):
+        from pairing_graph import PairingGraph, compile_graph
+
+        self.names  # The CSV has to exist first
+        compile_graph(self.csv_path, self.graph_path)
+        return PairingGraph(self.graph_path)
+
+    @functools.cached_property
+    def pages(self):
+        return page_texts(synthetic_flavor_lines(self.size, seed=self.seed))
+
+    @functools.cached_property
+    def rows(self):
+        """pages split back into (Page, Text) rows the way pdf.py does, so classify sees what classify_stream does."""
+        import pdf
+
+        return [row for num, text in self.pages for row in pdf.page_rows(num, text)]
+
+
+def scenarios(size, data_dir, seed):
+    """
+    Yields (name, ops, setup) for every scenario at this size. setup() generates
+    whatever data the scenario needs (shared between scenarios at this size)
+    and returns the function to time, so skipped scenarios generate nothing.
+    """
+    import pdf
+    from algorithm import build_ingredient_index, filter_pairings, load_dataset
+    from pairing_graph import PairingGraph, compile_graph
+    from similarity import pairings_from_index, top_k_similar
+    from taste_mask import TasteFilter
+
+    data = ScenarioData(size, data_dir, seed)
+
+    def load_pandas():
+        data.names  # Writes the CSV
+        return lambda: load_dataset(data.csv_path)
+
+    def compile_csv():
+        data.names  # Writes the CSV
+        return lambda: compile_graph(data.csv_path, data.graph_path)
+
+    def open_graph():
+        data.graph  # Compiles it
+        return lambda: PairingGraph(data.graph_path)
+
+    def lookup():
+        graph, sample = data.graph, data.sample
+        return lambda: [graph.get(n) for n in sample]
+
+    def filter_dict():
+        index, sample = build_ingredient_index(load_dataset(data.csv_path)), data.sample
+        return lambda: [filter_pairings(index, n, '1') for n in sample]
+
+    def filter_all():
+        taste_filter = TasteFilter(data.graph)
+        return lambda: taste_filter.filter_all('1')
+
+    def similarity():
+        graph = data.graph
+        return lambda: top_k_similar(pairings_from_index(graph))
+
+    def classify():
+        rows = data.rows
+        return lambda: pdf.classify(rows)
+
+    def classify_stream():
+        pages = data.pages
+        return lambda: sum(1 for _ in pdf.iter_tidy_rows(pages))
+
+    yield 'load_pandas', size, load_pandas
+    yield 'compile_graph', size, compile_csv
+    yield 'open_graph', 1, open_graph
+    yield 'lookup', LOOKUPS, lookup
+    yield 'filter_dict', LOOKUPS, filter_dict
+    yield 'filter_all', size, filter_all
+    yield 'similarity', size, similarity
+    yield 'classify', size, classify
+    yield 'classify_stream', size, classify_stream
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, repeat=3, data_dir=None, seed=0, only=None):
+    """Runs every scenario at every size. Returns the results document written by main()."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            for name, ops, setup in scenarios(size, data_dir or tmp, seed):
+                if only and name not in only:
+                    continue
+                if size > MAX_ROWS.get(name, size):
+                    print(f"  {name:<16} {size:>9,} rows  skipped (over {MAX_ROWS[name]:,})", file=sys.stderr)
+                    continue
+                seconds, _ = best_of(repeat if size < 1_000_000 else 1, setup())
+                results.append({'scenario': name, 'size': size, 'seconds': seconds, 'ops': ops,
+                                'ops_per_s': ops / seconds if seconds else None})
+                print(f"  {name:<16} {size:>9,} rows  {seconds * 1000:>10.2f}ms", file=sys.stderr)
+    return {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'results': results,
+    }
+
+
+def compare(old, new, threshold=0.2):
+    """Prints new/old time ratios per scenario and size. Returns the scenarios that got slower than threshold."""
+    before = {(r['scenario'], r['size']): r['seconds'] for r in old['results']}
+    slower = []
+    print(f"Comparing {new.get('commit')} against {old.get('commit')}:")
+    for r in new['results']:
+        key = (r['scenario'], r['size'])
+        if key not in before or not before[key]:
+            continue
+        ratio = r['seconds'] / before[key]
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  SLOWER'
+            slower.append(key)
+        print(f"  {r['scenario']:<16} {r['size']:>9,}  {before[key] * 1000:>10.2f}ms -> "
+              f"{r['seconds'] * 1000:>10.2f}ms  x{ratio:.2f}{flag}")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite on synthetic data")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated row counts, e.g. 1000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scenarios", help="comma-separated subset of scenarios to run")
+    parser.add_argument("--output", default='bench_results.json')
+    parser.add_argument("--data-dir", help="keep the generated data here instead of a temp directory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    only = set(args.scenarios.split(',')) if args.scenarios else None
+    document = run(sizes, args.repeat, args.data_dir, args.seed, only)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+    print(f"Wrote {len(document['results'])} results to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            slower = compare(json.load(f), document)
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
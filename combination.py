@@ -1,57 +1,110 @@
 import requests
 from dotenv import load_dotenv
 import os
-import pandas as pd
+import weakref
 
+from dataset import get_index, get_resolver
+from response_cache import cache_key
+from singleflight import SingleFlight
+from spoonacular_client import get_default_client
 
-# flavor_pairings dictionary
-flavor_pairings = {
-    'sweet': {'Flavor_profile_similar': ['salty', 'umami', 'sweet'], 'Flavor_profile_contrast': ['sour', 'bitter']},
-    'sour': {'Flavor_profile_similar': ['bitter', 'sour'], 'Flavor_profile_contrast': ['sweet', 'salty', 'umami']},
-    'salty': {'Flavor_profile_similar': ['umami', 'salty'], 'Flavor_profile_contrast': ['sweet', 'sour']},
-    'bitter': {'Flavor_profile_similar': ['sour', 'bitter'], 'Flavor_profile_contrast': ['sweet', 'salty']},
-    'umami': {'Flavor_profile_similar': ['salty', 'umami'], 'Flavor_profile_contrast': ['sweet', 'sour']}
-}
 
+# id(index) -> (weak reference to index, index version, NameResolver), so repeated calls with the
+# same index build its resolver once. Entries go away with their index.
+_resolvers = {}
 
-df = pd.read_csv('test4.csv')
 
+def _resolver_for(index):
+    """
+    The name resolver for a caller-supplied index, rebuilt when the index has a
+    version (ingredient_store.IngredientStore) that changed. Indexes that can't
+    be weakly referenced, such as plain dicts, get a new resolver every call.
+    """
+    from name_resolver import NameResolver
 
-df.rename(columns={'Taste (if app)': 'Taste', 'Function (if app)': 'Function'}, inplace=True)
-
+    if hasattr(index, 'maybe_refresh'):
+        index.maybe_refresh()
+    version = getattr(index, 'version', None)
+    cached = _resolvers.get(id(index))
+    if cached is not None and cached[0]() is index and cached[1] == version:
+        return cached[2]
+    resolver = NameResolver(index.ingredients() if hasattr(index, 'ingredients') else index)
+    try:
+        ref = weakref.ref(index, lambda _, key=id(index): _resolvers.pop(key, None))
+    except TypeError:
+        return resolver
+    _resolvers[id(index)] = (ref, version, resolver)
+    return resolver
 
-df['Ingredient'] = df['Ingredient'].str.lower().str.strip()
-df['Taste'] = df['Taste'].str.lower().str.replace('"', '').str.strip()
-df['Pairings'] = df['Pairings'].str.lower().str.replace('"', '').str.strip()
 
-def show_all_pairings_for_ingredient(ingredient: str, df: pd.DataFrame):
+def show_all_pairings_for_ingredient(ingredient: str, index=None, resolver=None):
     """
     Prints all pairings for a given ingredient from the local CSV.
+    Near misses ("tomatoes", "Chocolate, Dark", typos) resolve to the closest name.
     If the ingredient isn't found or doesn't have pairings, it prints a notice.
+    The dataset is loaded on the first call unless an index (and optionally its
+    resolver) is passed in.
     """
+    if index is None:
+        index, resolver = get_index(), get_resolver()
+    elif resolver is None:
+        resolver = _resolver_for(index)
     ingredient = ingredient.lower().strip()
-    row = df.loc[df['Ingredient'] == ingredient]
-    
-    if row.empty:
+    match, how = resolver.resolve(ingredient)
+
+    if match is None:
         print(f"No matching ingredient found for '{ingredient}'.")
         return
-    
-    pairings_str = row['Pairings'].values[0]
-    
-    if pd.isna(pairings_str) or not pairings_str.strip():
+    if how != 'exact':
+        print(f"Using '{match}' for '{ingredient}'.")
+    ingredient = match
+    entry = index.get(ingredient)
+
+    if not entry['pairings']:
         print(f"No pairings found for '{ingredient}'.")
     else:
         print(f"Pairings for '{ingredient}':")
-        print(pairings_str)
+        print(", ".join(entry['pairings']))
+
+def show_best_combinations(pantry, size=3, top_k=3):
+    """
+    Prints the best `size`-ingredient combinations from the pantry, scored by
+    local pairing strength and taste balance (see combination_search.py).
+    """
+    from combination_search import CombinationSearch
+
+    results = CombinationSearch(get_index()).search(pantry, size=size, top_k=top_k)
+    if not results:
+        print(f"Need at least {size} ingredients to build a combination.")
+        return
+    print(f"\n--- Best {size}-ingredient combinations ---")
+    for score, members in results:
+        print(f" - {', '.join(members)} (score {score:.2f})")
+
 
 load_dotenv()
 
 API_KEY = os.environ.get("API_KEY")
-BASE_URL = "https://api.spoonacular.com"
+BASE_URL = os.environ.get("SPOONACULAR_BASE_URL", "https://api.spoonacular.com")
 
-def search_recipes_by_query(api_key, query, ingredients=None, number=1):
+# Identical searches that overlap in time share one HTTP call; SEARCH_FLIGHT.stats() has the dedup ratio
+SEARCH_FLIGHT = SingleFlight()
+
+
+def fetch_coalesced(endpoint, params):
+    """GET through the shared client, joining an identical request already in flight instead of sending another."""
+    return SEARCH_FLIGHT.do(cache_key(endpoint, params), get_default_client().get_json, endpoint, params)
+
+
+async def fetch_coalesced_async(endpoint, params):
+    """Async fetch_coalesced: waiting on someone else's request doesn't hold a thread."""
+    return await SEARCH_FLIGHT.do_async(cache_key(endpoint, params), get_default_client().get_json,
+                                        endpoint, params)
+
+
+def query_request(api_key, query, ingredients=None, number=1):
     """
-    Searches for recipes using the 'complexSearch' endpoint.
+    Builds the (endpoint, params) for a 'complexSearch' request.
     """
     endpoint = f"{BASE_URL}/recipes/complexSearch"
     params = {
@@ -66,14 +119,17 @@ def search_recipes_by_query(api_key, query, ingredients=None, number=1):
     if ingredients:
         params["includeIngredients"] = ingredients
     
-    response = requests.get(endpoint, params=params)
-    response.raise_for_status() 
-    return response.json()
+    return endpoint, params
 
-def search_recipes_by_ingredients(api_key, ingredients, number=1):
+def search_recipes_by_query(api_key, query, ingredients=None, number=1):
     """
-    Searches for recipes that can be made with the specified ingredients
-    using the 'findByIngredients' endpoint.
+    Searches for recipes using the 'complexSearch' endpoint.
+    """
+    return fetch_coalesced(*query_request(api_key, query, ingredients, number))
+
+def ingredients_request(api_key, ingredients, number=1):
+    """
+    Builds the (endpoint, params) for a 'findByIngredients' request.
     """
     endpoint = f"{BASE_URL}/recipes/findByIngredients"
     
@@ -87,8 +143,14 @@ def search_recipes_by_ingredients(api_key, ingredients, number=1):
         "number": number
     }
     
-    response = requests.get(endpoint, params=params)
-    response.raise_for_status()  
+    return endpoint, params
+
+def search_recipes_by_ingredients(api_key, ingredients, number=1):
+    """
+    Searches for recipes that can be made with the specified ingredients
+    using the 'findByIngredients' endpoint.
+    """
+    return fetch_coalesced(*ingredients_request(api_key, ingredients, number))
 
 def print_complex_search_result(data):
     """
@@ -163,12 +225,38 @@ def print_findbyingredients_results(data):
         print("No recipes found with the given ingredients.")
 
 
+def show_pantry_recipes(pantry, top_n=5, candidates=None):
+    """
+    Fetches a page of findByIngredients candidates in one call and prints the
+    top_n after re-ranking them against the pantry's local pairings
+    (see pantry_rank.py), with each recipe's score breakdown.
+    """
+    from pantry_rank import CANDIDATE_PAGE, rank_recipes
+
+    pantry = [p.strip() for p in pantry if p.strip()]
+    data = search_recipes_by_ingredients(API_KEY, pantry, number=candidates or CANDIDATE_PAGE)
+    ranked = rank_recipes(data, pantry, get_index(), get_resolver(), top_n=top_n)
+    if not ranked:
+        print("No recipes found with the given ingredients.")
+        return
+
+    print(f"\n--- Top {len(ranked)} of {len(data)} recipes for your pantry ---")
+    for rank, (recipe, scores) in enumerate(ranked, start=1):
+        missed = ", ".join(ing.get('name', '') for ing in recipe.get('missedIngredients', []))
+        print(f"{rank}. {recipe.get('title', 'No title available')}  (score {scores['score']:.2f}: "
+              f"{scores['used']} used, {scores['missed']} missed, pairing strength {scores['pairing']:.2f})")
+        if missed:
+            print(f"   Missing: {missed}")
+
+
 def main():
     while True:
         print("\n=== Spoonacular Recipe Search ===")
         print("1) Search recipes by query (complexSearch)")
         print("2) Search recipes by ingredients (findByIngredients)")
-        print("3) Exit")
+        print("3) Best ingredient combinations from a pantry")
+        print("4) Recipes for my pantry, re-ranked by local pairings")
+        print("5) Exit")
         choice = input("Choose an option: ")
 
         if choice == "1":
@@ -208,13 +296,26 @@ def main():
             ingredients_list = [ing.strip() for ing in ingredients_input.split(',')]
             print(" pairings ")
             for ingredient in ingredients_list[:2]:
-                show_all_pairings_for_ingredient(ingredient, df)
+                show_all_pairings_for_ingredient(ingredient)
 
         elif choice == "3":
+            pantry_input = input("Enter your pantry (comma-separated): ")
+            size_input = input("How many ingredients per combination? (2-5, default 3): ").strip()
+            size = int(size_input) if size_input in {"2", "3", "4", "5"} else 3
+            show_best_combinations(pantry_input.split(','), size)
+
+        elif choice == "4":
+            pantry_input = input("Enter your pantry (comma-separated): ")
+            try:
+                show_pantry_recipes(pantry_input.split(','))
+            except requests.exceptions.RequestException as e:
+                print(f"An error occurred: {e}")
+
+        elif choice == "5":
             break
 
         else:
-            print("Invalid choice. Please select 1, 2, or 3.")
+            print("Invalid choice. Please select 1, 2, 3, 4, or 5.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
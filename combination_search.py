@@ -0,0 +1,179 @@
+"""
+Multi-ingredient combination search.
+
+Answers "which k ingredients from this pantry go best together". A set's score
+is the mean pairwise pairing strength of its members plus a taste-balance
+bonus:
+
+    pair strength  1.0 if either ingredient lists the other as a pairing,
+                   otherwise the Jaccard overlap of their pairing lists (0..1)
+    taste balance  share of the set's taste pairs that flavor_pairings calls
+                   similar or contrasting, times balance_weight
+
+Search is branch-and-bound over the pantry, with pair scores memoized. A
+branch is dropped when even the best remaining candidates, each counted with
+its gain against the chosen members and its best pair scores among the
+ingredients still to come, could not lift it into the current top-k. beam_width switches to beam search for very large
+pantries.
+"""
+import heapq
+import itertools
+import sys
+import time
+
+import numpy as np
+
+from algorithm import flavor_pairings
+
+
+def taste_relation(taste_a, taste_b):
+    """1 if flavor_pairings lists the tastes as similar or contrasting in either direction, else 0."""
+    for a, b in ((taste_a, taste_b), (taste_b, taste_a)):
+        rules = flavor_pairings.get(a)
+        if rules and (b in rules['Flavor_profile_similar'] or b in rules['Flavor_profile_contrast']):
+            return 1
+    return 0
+
+
+class CombinationSearch:
+    """Top-k ingredient combinations from a pantry, scored against an algorithm.py index or PairingGraph."""
+
+    def __init__(self, index, balance_weight=0.25):
+        self.index = index
+        self.balance_weight = balance_weight
+        self._entries = {}
+        self._pair_scores = {}
+
+    def _entry(self, name):
+        if name not in self._entries:
+            entry = self.index.get(name)
+            if entry is None:
+                self._entries[name] = (frozenset(), ())
+            else:
+                self._entries[name] = (frozenset(entry['pairings']), tuple(entry['tastes']))
+        return self._entries[name]
+
+    def pair_score(self, a, b):
+        """Pairing strength plus taste balance for one pair. Symmetric and memoized."""
+        if b < a:
+            a, b = b, a
+        if (a, b) not in self._pair_scores:
+            self._pair_scores[a, b] = self._score_pair(a, b)
+        return self._pair_scores[a, b]
+
+    def _score_pair(self, a, b):
+        pairings_a, tastes_a = self._entry(a)
+        pairings_b, tastes_b = self._entry(b)
+        if b in pairings_a or a in pairings_b:
+            strength = 1.0
+        else:
+            union = len(pairings_a | pairings_b)
+            strength = len(pairings_a & pairings_b) / union if union else 0.0
+        taste_pairs = [(x, y) for x in tastes_a for y in tastes_b]
+        balance = sum(taste_relation(x, y) for x, y in taste_pairs) / len(taste_pairs) if taste_pairs else 0.0
+        return strength + self.balance_weight * balance
+
+    def set_score(self, members):
+        """Mean pair score over every pair in the set."""
+        pairs = list(itertools.combinations(members, 2))
+        return sum(self.pair_score(a, b) for a, b in pairs) / len(pairs)
+
+    def search(self, pantry, size=3, top_k=5, beam_width=None):
+        """
+        Returns the top_k best `size`-ingredient combinations from `pantry` as
+        [(score, (ingredient, ...)), ...], best first.
+        """
+        names = sorted({p.lower().strip() for p in pantry if p.strip()})
+        n = len(names)
+        if n < size or size < 2:
+            return []
+
+        # Pair-score matrix, filled once from the memoized pair scores
+        scores = np.zeros((n, n))
+        for i, j in itertools.combinations(range(n), 2):
+            scores[i, j] = scores[j, i] = self.pair_score(names[i], names[j])
+        n_pairs = size * (size - 1) // 2
+
+        if beam_width:
+            results = self._beam(scores, size, top_k, beam_width)
+        else:
+            results = self._branch_and_bound(scores, size, top_k, n_pairs)
+        return [(float(total / n_pairs), tuple(names[i] for i in members)) for total, members in results]
+
+    def _branch_and_bound(self, scores, size, top_k, n_pairs):
+        n = len(scores)
+        # Visit strong ingredients first so good sets are found early and the bound bites sooner
+        order = np.argsort(-scores.max(axis=1), kind='stable')
+        scores = scores[np.ix_(order, order)]
+        # top_from[s][c, m - 1] is the sum of c's m best pair scores with ingredients
+        # from s on. The ingredients still to be added all come from `start` on, so
+        # each one's pairs with the other left - 1 sum to at most top_from[start][c, left - 2].
+        top_from = np.zeros((n + 1, n, max(size - 1, 1)))
+        best = np.zeros((n, max(size - 1, 1)))  # Each row's best scores so far, descending
+        for s in range(n - 1, -1, -1):
+            best = -np.sort(-np.concatenate([best, scores[:, s:s + 1]], axis=1), axis=1)[:, :-1]
+            top_from[s] = np.cumsum(best, axis=1)
+
+        heap = []  # min-heap of (total, members) holding the current top_k
+
+        def extend(members, total, start):
+            chosen = len(members)
+            if chosen == size:
+                item = (total, tuple(sorted(order[m] for m in members)))
+                if len(heap) < top_k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+                return
+            left = size - chosen
+            stop = n - left + 1
+            # What each candidate adds through its pairs with the chosen members
+            gains = scores[start:, members].sum(axis=1) if members else np.zeros(n - start)
+            # A candidate's share of what the rest adds: its gain plus half of its
+            # pairs with the other additions. The rest adds the sum of its members'
+            # shares, so the `left` best shares from i on bound every branch from i.
+            shares = gains + top_from[start][start:, left - 2] / 2 if left > 1 else gains
+            top = np.sort(shares)[::-1][:left]
+            if len(heap) == top_k and total + top.sum() <= heap[0][0]:
+                return
+            # From i on: the best share there, plus the left - 1 others, each no better
+            # than that share and together no better than the left - 1 best overall
+            best_share = np.maximum.accumulate(shares[::-1])[::-1]
+            bounds = total + best_share + np.minimum(top[:left - 1].sum(), (left - 1) * best_share)
+            for i in range(start, stop):
+                if len(heap) == top_k and bounds[i - start] <= heap[0][0]:
+                    break  # The bound only shrinks as i grows, so later branches can't do better
+                members.append(i)
+                extend(members, total + gains[i - start], i + 1)
+                members.pop()
+
+        extend([], 0.0, 0)
+        return sorted(heap, reverse=True)
+
+    def _beam(self, scores, size, top_k, beam_width):
+        n = len(scores)
+        beam = [(0.0, (i,)) for i in range(n)]
+        for _ in range(size - 1):
+            candidates = {}
+            for total, members in beam:
+                for i in range(members[-1] + 1, n):
+                    key = members + (i,)
+                    candidates[key] = total + scores[i, list(members)].sum()
+            beam = heapq.nlargest(beam_width, ((t, m) for m, t in candidates.items()))
+        return beam[:top_k]
+
+
+if __name__ == "__main__":
+    from dataset import get_index
+
+    path = sys.argv[1] if len(sys.argv) > 1 else 'test4.csv'
+    index = get_index(path)
+    pantry = list(index.ingredients())
+    search = CombinationSearch(index)
+    for size in (3, 4, 5):
+        t0 = time.perf_counter()
+        top = search.search(pantry, size=size, top_k=3)
+        elapsed = time.perf_counter() - t0
+        print(f"Best {size}-ingredient combinations from {len(pantry)} ingredients ({elapsed * 1000:.1f}ms):")
+        for score, members in top:
+            print(f"  {score:.3f}  {', '.join(members)}")
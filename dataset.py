@@ -0,0 +1,94 @@
+"""
+Lazily loaded, memoized ingredient data.
+
+Nothing is read at import time. The first call for a given file loads it and
+later calls return the same object, so every module in the process shares one
+copy. Set FLAVOR_DATASET to change the default file.
+"""
+import functools
+import os
+
+DEFAULT_DATASET = os.environ.get("FLAVOR_DATASET", "test4.csv")
+
+# --dataset value that selects the merged, hot-reloading store instead of one CSV
+ALL_SOURCES = 'all'
+
+
+@functools.lru_cache(maxsize=None)
+def _load_index(path):
+    from pairing_graph import load_graph
+    return load_graph(path)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_dataframe(path):
+    from algorithm import load_dataset
+    return load_dataset(path)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_taste_filter(path):
+    from taste_mask import TasteFilter
+    return TasteFilter(_load_index(path))
+
+
+@functools.lru_cache(maxsize=None)
+def _load_resolver(path):
+    from name_resolver import NameResolver
+    return NameResolver(_load_index(path).ingredients())
+
+
+@functools.lru_cache(maxsize=None)
+def _load_store(paths, poll_interval):
+    from ingredient_store import IngredientStore
+    return IngredientStore(list(paths) if paths is not None else None, poll_interval)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_answer_cache(path):
+    from answer_cache import AnswerCache
+    return AnswerCache(path)
+
+
+def get_index(path=None):
+    """The memory-mapped pairing index (see pairing_graph.py) for path, loaded on first use."""
+    return _load_index(os.path.abspath(path or DEFAULT_DATASET))
+
+
+def get_dataframe(path=None):
+    """The normalized pandas DataFrame for path, loaded on first use. Only needed for column-level work."""
+    return _load_dataframe(os.path.abspath(path or DEFAULT_DATASET))
+
+
+def get_taste_filter(path=None):
+    """The vectorized similar/contrast filter (see taste_mask.py) over get_index(path)."""
+    return _load_taste_filter(os.path.abspath(path or DEFAULT_DATASET))
+
+
+def get_resolver(path=None):
+    """The fuzzy name resolver (see name_resolver.py) over the ingredients of get_index(path)."""
+    return _load_resolver(os.path.abspath(path or DEFAULT_DATASET))
+
+
+def get_store(paths=None, poll_interval=5.0):
+    """
+    The merged store over several CSVs (see ingredient_store.py), by default every
+    bundled source. It re-checks its files at most every poll_interval seconds.
+    """
+    key = tuple(os.path.abspath(p) for p in paths) if paths is not None else None
+    return _load_store(key, poll_interval)
+
+
+def get_answer_cache(path=None):
+    """Precomputed similar/contrast/all answers (see answer_cache.py) for path, rebuilt when the CSV changes."""
+    return _load_answer_cache(os.path.abspath(path or DEFAULT_DATASET))
+
+
+def clear():
+    """Forgets every loaded dataset, so the next call reads the files again."""
+    _load_answer_cache.cache_clear()
+    _load_store.cache_clear()
+    _load_resolver.cache_clear()
+    _load_taste_filter.cache_clear()
+    _load_index.cache_clear()
+    _load_dataframe.cache_clear()
@@ -0,0 +1,200 @@
+"""
+One merged ingredient store over several source CSVs.
+
+Every source (test*.csv in the wide format, flavor_bible_full.csv in pdf.py's
+Main/Pairing format) is read into its own contribution. The merged entry for an
+ingredient combines the contributions of every source that has a row for it:
+
+    pairings    union over all sources, in source order, duplicates dropped
+    attributes  tastes, function, weight and volume come from the first source
+                (in the order given) with a non-empty value; when sources
+                disagree the losing values are kept in store.conflicts
+
+All names are interned, so an ingredient that appears in many sources and
+pairing lists is stored once.
+
+refresh() re-stats the sources and re-reads only the files whose size or
+mtime changed, then re-merges only the ingredients those files touch. With
+poll_interval set, lookups call it themselves at most that often, so a
+long-running process picks up edited CSVs without restarting. A lock keeps
+lookups from seeing a half-applied refresh, and iteration walks a snapshot of
+the names, so a refresh on another thread can't break it. store.version goes
+up by one on every refresh that changed something.
+"""
+import csv
+import glob
+import os
+import sys
+import threading
+import time
+from collections.abc import Mapping
+
+from metrics import timed
+from pairing_graph import normalize, source_fingerprint, split_items
+
+ATTRIBUTES = ['tastes', 'function', 'weight', 'volume']
+
+# Wide-format column for each attribute, with the older "(if app)" spelling first
+COLUMNS = {
+    'tastes': ('Taste (if app)', 'Taste'),
+    'function': ('Function (if app)', 'Function'),
+    'weight': ('Weight',),
+    'volume': ('Volume',),
+}
+
+
+def default_sources(directory='.'):
+    """
+    The bundled test*.csv files, newest revision (test4.csv, the one the scripts
+    use) first, plus flavor_bible_full.csv if pdf.py has produced it.
+    """
+    paths = sorted(glob.glob(os.path.join(directory, 'test*.csv')), reverse=True)
+    full = os.path.join(directory, 'flavor_bible_full.csv')
+    if os.path.exists(full):
+        paths.append(full)
+    return paths
+
+
+def _items(values):
+    return tuple(sys.intern(v) for v in values)
+
+
+@timed('csv_load_seconds', source='store')
+def read_records(csv_path):
+    """
+    Reads one source into {ingredient: {'pairings': (...), 'tastes': (...), ...}}.
+    As elsewhere, the first row for an ingredient wins within one file.
+    """
+    records = {}
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        fields = reader.fieldnames or []
+        if 'Main' in fields and 'Pairing' in fields:
+            pairings = {}
+            for row in reader:
+                main = normalize(row['Main'] or '')
+                pairing = normalize(row['Pairing'] or '')
+                if main and pairing:
+                    pairings.setdefault(sys.intern(main), []).append(pairing)
+            for main, items in pairings.items():
+                record = {a: () for a in ATTRIBUTES}
+                record['pairings'] = _items(dict.fromkeys(items))
+                records[main] = record
+        else:
+            columns = {a: next((c for c in options if c in fields), None) for a, options in COLUMNS.items()}
+            for row in reader:
+                ingredient = normalize(row['Ingredient'] or '')
+                if not ingredient or ingredient in records:
+                    continue
+                record = {a: _items(split_items(row[col] or '')) if col else () for a, col in columns.items()}
+                record['pairings'] = _items(split_items(row['Pairings'] or ''))
+                records[sys.intern(ingredient)] = record
+    return records
+
+
+class IngredientStore(Mapping):
+    """
+    Merged, read-only {ingredient: entry} mapping over `paths`, earlier paths
+    taking precedence for attributes. Entries look like the algorithm.py index
+    ({'tastes', 'pairings'}) plus 'function', 'weight', 'volume' and 'sources'.
+    """
+
+    def __init__(self, paths=None, poll_interval=None):
+        self.paths = [os.path.abspath(p) for p in (paths if paths is not None else default_sources())]
+        self.poll_interval = poll_interval
+        self.conflicts = {}
+        self._fingerprints = {}
+        self._contributions = {}  # path -> records from read_records
+        self._entries = {}
+        self._last_check = 0.0
+        self._lock = threading.RLock()
+        self.version = 0
+        self.refresh()
+
+    def refresh(self):
+        """Re-reads changed or removed sources and re-merges what they touch. Returns the changed paths."""
+        with self._lock:
+            self._last_check = time.monotonic()
+            changed = []
+            touched = set()
+            for path in self.paths:
+                fingerprint = source_fingerprint(path) if os.path.exists(path) else None
+                if fingerprint == self._fingerprints.get(path):
+                    continue
+                old = self._contributions.pop(path, {})
+                new = read_records(path) if fingerprint is not None else {}
+                touched.update(old)
+                touched.update(new)
+                if new:
+                    self._contributions[path] = new
+                self._fingerprints[path] = fingerprint
+                changed.append(path)
+            for name in touched:
+                self._merge(name)
+            if changed:
+                self.version += 1
+            return changed
+
+    def _merge(self, name):
+        parts = [(path, self._contributions[path][name]) for path in self.paths
+                 if name in self._contributions.get(path, ())]
+        self.conflicts.pop(name, None)
+        if not parts:
+            self._entries.pop(name, None)
+            return
+        entry = {'pairings': _items(dict.fromkeys(p for _, record in parts for p in record['pairings']))}
+        for attr in ATTRIBUTES:
+            values = {path: record[attr] for path, record in parts if record[attr]}
+            entry[attr] = next(iter(values.values()), ())
+            if len(set(values.values())) > 1:
+                self.conflicts.setdefault(name, {})[attr] = values
+        entry['sources'] = tuple(path for path, _ in parts)
+        self._entries[name] = entry
+
+    def maybe_refresh(self):
+        """refresh(), if poll_interval is set and has passed since the last check."""
+        if self.poll_interval is not None and time.monotonic() - self._last_check >= self.poll_interval:
+            self.refresh()
+
+    def __getitem__(self, name):
+        self.maybe_refresh()
+        with self._lock:
+            return self._entries[name]
+
+    def __iter__(self):
+        self.maybe_refresh()
+        with self._lock:
+            return iter(list(self._entries))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def ingredients(self):
+        """Every ingredient with a row in some source (all of them, here)."""
+        return iter(self)
+
+
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+
+    # Work on copies, so touching a source below doesn't change the real file's mtime
+    tmp = tempfile.TemporaryDirectory()
+    paths = [shutil.copy2(p, tmp.name) for p in (sys.argv[1:] or default_sources())]
+    t0 = time.perf_counter()
+    store = IngredientStore(paths)
+    elapsed = time.perf_counter() - t0
+    n_pairings = sum(len(entry['pairings']) for entry in store.values())
+    print(f"Merged {len(paths)} sources into {len(store)} ingredients, {n_pairings} pairings "
+          f"({elapsed * 1000:.1f}ms), {len(store.conflicts)} with conflicting attributes")
+    for name, attrs in list(store.conflicts.items())[:5]:
+        for attr, values in attrs.items():
+            print(f"  {name} {attr}: " + "; ".join(f"{os.path.basename(p)}={', '.join(v)}" for p, v in values.items()))
+
+    # Touch one source and show that only its contribution is re-read
+    os.utime(paths[-1])
+    t0 = time.perf_counter()
+    changed = store.refresh()
+    print(f"Refresh after touching {os.path.basename(paths[-1])}: re-read {len(changed)} source(s) "
+          f"in {(time.perf_counter() - t0) * 1000:.1f}ms")
@@ -1,7 +1,10 @@
+from metrics import timed
+
 chocolate = ['nutty', 'sweet', 'creamy']
 vanilla = ['sweet', 'creamy', 'cold']
 pickle = ['sour', 'salty', 'cold']
 
+@timed('jaccard_seconds', kind='similarity')
 def jaccard_similarity(list1, list2):
     intersection = len(set(list1).intersection(list2))
     union = len(set(list1).union(list2))
@@ -14,31 +17,36 @@ def contrast_score(list1, list2):
         return float('inf')
     return union / intersection
 
+@timed('jaccard_seconds', kind='contrast')
 def normalize_contrast_score(list1, list2):
-    contrast = contrast_score(list1, list2)
-    max_possible_contrast = len(set(list1).union(list2))  # Union size as the maximum
-    return contrast / max_possible_contrast
-
-# Calculate scores for chocolate and vanilla
-jaccard = jaccard_similarity(chocolate, pickle)
-normalized_contrast = normalize_contrast_score(chocolate, pickle)
-
-# Weights
-jaccard_weight = 0.5
-contrast_weight = 0.5
-
-# Total score
-total_score = jaccard_weight * jaccard + contrast_weight * normalized_contrast
-
-# Print results
-print("Jaccard Similarity:", jaccard)
-print("Normalized Contrast Score:", normalized_contrast)
-print("Total Score:", total_score)
-
-# Interpretation
-if jaccard > 0.5:
-    print("Chocolate and vanilla are similar.")
-elif jaccard >= 0.4:
-    print("Chocolate and vanilla are somewhat similar.")
-else:
-    print("Chocolate and vanilla are not similar.")
+    # contrast_score / union size is 1 / shared values, which is inf when nothing is shared.
+    # 1 / (shared values + 1) keeps the same order, stays in [0, 1] and scores no overlap highest.
+    if not set(list1).union(list2):
+        return 0.0
+    return 1 / (len(set(list1).intersection(list2)) + 1)
+
+
+if __name__ == "__main__":
+    # Calculate scores for chocolate and vanilla
+    jaccard = jaccard_similarity(chocolate, pickle)
+    normalized_contrast = normalize_contrast_score(chocolate, pickle)
+
+    # Weights
+    jaccard_weight = 0.5
+    contrast_weight = 0.5
+
+    # Total score
+    total_score = jaccard_weight * jaccard + contrast_weight * normalized_contrast
+
+    # Print results
+    print("Jaccard Similarity:", jaccard)
+    print("Normalized Contrast Score:", normalized_contrast)
+    print("Total Score:", total_score)
+
+    # Interpretation
+    if jaccard > 0.5:
+        print("Chocolate and vanilla are similar.")
+    elif jaccard >= 0.4:
+        print("Chocolate and vanilla are somewhat similar.")
+    else:
+        print("Chocolate and vanilla are not similar.")
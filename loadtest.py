@@ -0,0 +1,120 @@
+"""
+Load test for service.py.
+
+Each worker thread holds one keep-alive connection and sends a mix of lookup
+requests as fast as the service answers them. Reports QPS and p50/p99 latency
+per endpoint and overall.
+
+    python loadtest.py                              # starts a service in this process
+    python loadtest.py --url http://127.0.0.1:8090 --workers 16 --duration 10
+
+The in-process service shares the GIL with the load generator, so numbers
+against a separately started `python service.py` are the fairer ones.
+"""
+import argparse
+import http.client
+import itertools
+import threading
+import time
+from urllib.parse import quote, urlparse
+
+import numpy as np
+
+
+def request_mix(ingredients):
+    """Endless cycle of (endpoint, path) covering every lookup endpoint for every ingredient."""
+    paths = []
+    for name in ingredients:
+        q = quote(name)
+        paths.append(('pairings', f"/pairings?ingredient={q}"))
+        paths.append(('filter', f"/filter?ingredient={q}&mode=similar"))
+        paths.append(('filter', f"/filter?ingredient={q}&mode=contrast"))
+        paths.append(('similar', f"/similar?ingredient={q}&k=5"))
+    return itertools.cycle(paths)
+
+
+def _worker(host, port, paths, lock, deadline, samples, errors):
+    conn = http.client.HTTPConnection(host, port)
+    while time.perf_counter() < deadline:
+        with lock:
+            endpoint, path = next(paths)
+        t0 = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status < 500
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(host, port)
+            ok = False
+        elapsed = time.perf_counter() - t0
+        if ok:
+            samples.setdefault(endpoint, []).append(elapsed)
+        else:
+            errors[endpoint] = errors.get(endpoint, 0) + 1
+    conn.close()
+
+
+def run_load(base_url, ingredients, workers=8, duration=5.0):
+    """
+    Runs the load test and returns {endpoint: {'requests', 'errors', 'qps', 'p50_ms', 'p99_ms'}},
+    with the overall numbers under 'all'.
+    """
+    url = urlparse(base_url)
+    paths = request_mix(ingredients)
+    lock = threading.Lock()
+    per_worker = [({}, {}) for _ in range(workers)]
+    t0 = time.perf_counter()
+    deadline = t0 + duration
+    threads = [threading.Thread(target=_worker, args=(url.hostname, url.port, paths, lock, deadline, s, e))
+               for s, e in per_worker]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    latencies, errors = {}, {}
+    for samples, errs in per_worker:
+        for endpoint, values in samples.items():
+            latencies.setdefault(endpoint, []).extend(values)
+        for endpoint, count in errs.items():
+            errors[endpoint] = errors.get(endpoint, 0) + count
+    latencies['all'] = [v for values in latencies.values() for v in values]
+    errors['all'] = sum(errors.values())
+
+    report = {}
+    for endpoint, values in latencies.items():
+        values = np.array(values) * 1000
+        report[endpoint] = {
+            'requests': len(values),
+            'errors': errors.get(endpoint, 0),
+            'qps': round(len(values) / wall, 1),
+            'p50_ms': round(float(np.percentile(values, 50)), 3) if len(values) else None,
+            'p99_ms': round(float(np.percentile(values, 99)), 3) if len(values) else None,
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for the pairing service")
+    parser.add_argument("--url", help="running service to test; by default one is started in-process")
+    parser.add_argument("--dataset", default=None)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds")
+    args = parser.parse_args()
+
+    from dataset import get_index
+
+    ingredients = list(get_index(args.dataset).ingredients())
+    base_url = args.url
+    if base_url is None:
+        from service import start_service
+        base_url = start_service(dataset=args.dataset).base_url
+
+    report = run_load(base_url, ingredients, args.workers, args.duration)
+    print(f"{base_url}, {args.workers} workers, {args.duration:.0f}s:")
+    for endpoint, stats in report.items():
+        print(f"  {endpoint:<9} {stats['requests']:>7} requests  {stats['errors']:>4} errors  "
+              f"{stats['qps']:>8.1f} QPS  p50 {stats['p50_ms']}ms  p99 {stats['p99_ms']}ms")
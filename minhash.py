@@ -0,0 +1,152 @@
+"""
+Approximate similar-ingredient search with MinHash and banded LSH.
+
+Each ingredient's pairing set (optionally plus its tastes) is reduced to a
+MinHash signature. Signatures are cut into bands and every band is hashed into
+a bucket, so a query only looks at ingredients that share at least one bucket
+with it instead of scanning every candidate. Candidates are then ranked by
+their exact Jaccard score.
+
+Recall against the exact engine in similarity.py is reported by running this
+module directly.
+"""
+import sys
+import time
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def feature_sets(index, include_tastes=False):
+    """
+    Builds {ingredient: set of features} from an algorithm.py index or PairingGraph.
+    Tastes are added as 'taste:<name>' features when include_tastes is set.
+    """
+    names = index.ingredients() if hasattr(index, 'ingredients') else index
+    sets = {}
+    for name in names:
+        entry = index.get(name)
+        features = set(entry['pairings'])
+        if include_tastes:
+            features.update(f"taste:{t}" for t in entry['tastes'])
+        sets[name] = features
+    return sets
+
+
+def jaccard(a, b):
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+
+class MinHashLSH:
+    """
+    MinHash signatures with banded LSH buckets.
+
+    num_perm = bands * rows. More bands with fewer rows finds lower-similarity
+    neighbors at the cost of more candidates per query.
+    """
+
+    def __init__(self, bands=64, rows=2, seed=1):
+        self.bands = bands
+        self.rows = rows
+        self.num_perm = bands * rows
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, self.num_perm, dtype=np.int64)
+        self._b = rng.integers(0, MERSENNE_PRIME, self.num_perm, dtype=np.int64)
+        self._buckets = [defaultdict(list) for _ in range(bands)]
+        self._sets = {}
+        self._signatures = {}
+
+    def signature(self, features):
+        """MinHash signature of a feature set. An empty set gets an all-max signature."""
+        if not features:
+            return np.full(self.num_perm, MERSENNE_PRIME, dtype=np.int64)
+        x = np.fromiter((zlib.crc32(f.encode('utf-8')) % MERSENNE_PRIME for f in features),
+                        dtype=np.int64, count=len(features))
+        hashes = (self._a[:, None] * x[None, :] + self._b[:, None]) % MERSENNE_PRIME
+        return hashes.min(axis=1)
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, key, features):
+        features = set(features)
+        signature = self.signature(features)
+        self._sets[key] = features
+        self._signatures[key] = signature
+        if features:
+            for band, band_key in self._band_keys(signature):
+                self._buckets[band][band_key].append(key)
+
+    def candidates(self, features):
+        """Keys that share at least one LSH bucket with the feature set."""
+        found = set()
+        if not features:
+            return found
+        for band, band_key in self._band_keys(self.signature(set(features))):
+            found.update(self._buckets[band].get(band_key, ()))
+        return found
+
+    def query(self, key, k=5):
+        """
+        Approximate top-k most similar keys to an indexed key, best first,
+        as [(other_key, jaccard), ...]. Ties are broken by key.
+        """
+        features = self._sets[key]
+        scored = []
+        for other in self.candidates(features):
+            if other == key:
+                continue
+            score = jaccard(features, self._sets[other])
+            if score > 0:
+                scored.append((other, score))
+        scored.sort(key=lambda x: (-x[1], x[0]))
+        return scored[:k]
+
+
+def build_index(sets, bands=64, rows=2, seed=1):
+    lsh = MinHashLSH(bands, rows, seed)
+    for key, features in sets.items():
+        lsh.add(key, features)
+    return lsh
+
+
+def recall_at_k(lsh, exact, k):
+    """
+    Mean recall@k of the LSH index against exact top-k lists
+    ({key: [(other, score), ...]}). Keys with no exact neighbors are skipped.
+    """
+    recalls = []
+    for key, expected in exact.items():
+        expected = {other for other, _ in expected[:k]}
+        if not expected:
+            continue
+        found = {other for other, _ in lsh.query(key, k)}
+        recalls.append(len(found & expected) / len(expected))
+    return sum(recalls) / len(recalls) if recalls else 1.0
+
+
+if __name__ == "__main__":
+    from pairing_graph import load_graph
+    from similarity import top_k_similar
+
+    k = 5
+    for path in sys.argv[1:] or ['test.csv', 'test2.csv', 'test3.csv', 'test4.csv']:
+        sets = feature_sets(load_graph(path))
+        exact = top_k_similar({key: list(features) for key, features in sets.items()}, k)
+
+        t0 = time.perf_counter()
+        lsh = build_index(sets)
+        build_elapsed = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for key in sets:
+            lsh.query(key, k)
+        query_elapsed = (time.perf_counter() - t0) / max(len(sets), 1)
+
+        print(f"{path}: {len(sets)} ingredients, recall@{k} = {recall_at_k(lsh, exact, k):.3f}, "
+              f"build {build_elapsed * 1000:.1f}ms, {query_elapsed * 1e6:.0f}us/query")
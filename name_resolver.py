@@ -0,0 +1,128 @@
+"""
+Fuzzy ingredient name resolution.
+
+Lookups elsewhere are exact, so "tomatoes" misses "tomato", "chocolate, dark"
+misses "dark chocolate", and "BASIL" from a pdf.py heading misses "basil".
+NameResolver tries, in order:
+
+    exact       the name as typed, lowercased and stripped
+    canonical   punctuation dropped, each word singularized, words sorted,
+                so "Chocolate, Dark" and "dark chocolates" both become
+                "chocolate dark"
+    fuzzy       character trigrams of the canonical form, looked up in an
+                inverted index. Only names sharing a trigram with the query
+                are scored (Dice coefficient), never the whole list.
+"""
+import re
+import sys
+
+import numpy as np
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Plural endings, most specific first. Words ending in these stay as they are.
+KEEP_ENDINGS = ('ss', 'us', 'is', 'ous')
+PLURAL_RULES = [('ies', 'y'), ('oes', 'o'), ('ches', 'ch'), ('shes', 'sh'), ('xes', 'x'), ('sses', 'ss')]
+
+
+def singular(word):
+    """Best-effort English singular of one lowercase word."""
+    if len(word) <= 3 or word.endswith(KEEP_ENDINGS):
+        return word
+    for suffix, replacement in PLURAL_RULES:
+        if word.endswith(suffix):
+            return word[:-len(suffix)] + replacement
+    if word.endswith('s'):
+        return word[:-1]
+    return word
+
+
+def canonical(name):
+    """Order- and plural-insensitive form of a name: 'Chocolate, Dark' -> 'chocolate dark'."""
+    return " ".join(sorted(singular(w) for w in WORD_PATTERN.findall(name.lower())))
+
+
+def trigrams(text):
+    """Set of character trigrams of text, padded so short names still get some."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameResolver:
+    """Resolves free-form names to names from `names` (e.g. index.ingredients())."""
+
+    def __init__(self, names, min_score=0.7):
+        self.min_score = min_score
+        self.names = sorted(set(names))
+        self._exact = set(self.names)
+        self._canonical = {}
+        for name in self.names:
+            self._canonical.setdefault(canonical(name), name)
+
+        # Inverted index over canonical forms: trigram -> ids into self._forms
+        self._forms = list(self._canonical)
+        postings = {}
+        for i, form in enumerate(self._forms):
+            for gram in trigrams(form):
+                postings.setdefault(gram, []).append(i)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self._sizes = np.array([len(trigrams(form)) for form in self._forms])
+
+    def resolve(self, name):
+        """
+        Returns (match, how) where how is 'exact', 'canonical' or 'fuzzy'.
+        Returns (None, None) if nothing is close enough.
+        """
+        name = name.lower().strip()
+        if name in self._exact:
+            return name, 'exact'
+        form = canonical(name)
+        if form in self._canonical:
+            return self._canonical[form], 'canonical'
+        match = self._fuzzy(form)
+        if match is not None:
+            return match, 'fuzzy'
+        return None, None
+
+    def _fuzzy(self, form):
+        grams = trigrams(form)
+        hits = [self._postings[g] for g in grams if g in self._postings]
+        if not hits:
+            return None
+        ids, shared = np.unique(np.concatenate(hits), return_counts=True)
+        scores = 2 * shared / (len(grams) + self._sizes[ids])
+        best = int(np.argmax(scores))
+        if scores[best] < self.min_score:
+            return None
+        return self._canonical[self._forms[ids[best]]]
+
+
+def hit_rates(index):
+    """
+    How every distinct pairing name in the index resolves against the names
+    that have rows. Anything past 'exact' would have been a "not found in
+    dataset" warning before. Returns a dict of counts per stage.
+    """
+    resolver = NameResolver(index.ingredients())
+    counts = {'exact': 0, 'canonical': 0, 'fuzzy': 0, 'missed': 0}
+    seen = set()
+    for name in resolver.names:
+        for p in index.get(name)['pairings']:
+            if p in seen:
+                continue
+            seen.add(p)
+            _, how = resolver.resolve(p)
+            counts[how or 'missed'] += 1
+    return counts
+
+
+if __name__ == "__main__":
+    from dataset import get_index
+
+    paths = sys.argv[1:] or ['test.csv', 'test2.csv', 'test3.csv', 'test4.csv']
+    for path in paths:
+        counts = hit_rates(get_index(path))
+        total = sum(counts.values())
+        resolved = total - counts['missed']
+        print(f"{path}: {resolved}/{total} distinct pairing names resolve to a row "
+              f"({resolved / max(total, 1):.0%}): " + ", ".join(f"{k} {v}" for k, v in counts.items()))
@@ -25,16 +25,20 @@ def compare_similarity(ingredient1, ingredient2):
         return jaccard_similarity
     else:
         return "One or both ingredients not found in the pairings database."
-    
 
-# Test
-ingredient_to_check = "chocolate"
-paired_ingredients = get_paired_ingredients(ingredient_to_check)
 
+def most_similar_ingredients(k=3):
+    """Top-k most similar ingredients for every ingredient, computed in one batch."""
+    from similarity import top_k_similar
+    return top_k_similar(ingredient_pairings, k)
 
-print(compare_similarity("chocolate", "vanilla"))
 
+if __name__ == "__main__":
+    # Test
+    ingredient_to_check = "chocolate"
+    paired_ingredients = get_paired_ingredients(ingredient_to_check)
 
+    print(compare_similarity("chocolate", "vanilla"))
 
-# Display Results
-print(f"Best ingredient pairings for {ingredient_to_check}: {paired_ingredients}")
\ No newline at end of file
+    # Display Results
+    print(f"Best ingredient pairings for {ingredient_to_check}: {paired_ingredients}")
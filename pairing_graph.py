@@ -0,0 +1,264 @@
+"""
+Compact binary pairing graph.
+
+Compiles an ingredient CSV (test4.csv style, or pdf.py's Main/Pairing output)
+into a single file that can be memory-mapped:
+
+    header         magic, format version, counts, source fingerprint, section offsets
+    name table     sorted, interned ingredient names (offsets + utf-8 blob)
+    CSR arrays     row_offsets[n_nodes + 1], neighbors[n_edges]
+    taste masks    one uint64 bitmask per ingredient
+    flags          1 if the ingredient has its own row, 0 if it only appears as a pairing
+    taste table    the taste name for each bit position
+
+Loading only maps the file, so startup doesn't depend on the size of the data,
+and every process that maps the same file shares one copy through the page cache.
+"""
+import bisect
+import csv
+import mmap
+import os
+import struct
+import sys
+
+import numpy as np
+
+from algorithm import flavor_pairings
+from atomic_file import write_atomic
+from metrics import inc, timed
+
+MAGIC = b'PGRF'
+FORMAT_VERSION = 1
+
+# magic, version, n_nodes, n_edges, n_tastes, source size, source mtime_ns, 7 section offsets
+HEADER = struct.Struct('<4sIIIIqq7Q')
+
+# Tastes from flavor_pairings always get the low bits, in this order
+BASE_TASTES = list(flavor_pairings)
+
+
+def normalize(value):
+    """Same normalization as algorithm.load_dataset: lowercase, no quotes, no surrounding whitespace."""
+    return value.lower().replace('"', '').strip()
+
+
+def split_items(value):
+    """Splits a comma-separated cell into normalized, non-empty items."""
+    return [item.strip() for item in normalize(value).split(',') if item.strip()]
+
+
+def read_source(csv_path):
+    """
+    Reads a pairing CSV into {ingredient: (tastes, pairings)}.
+
+    Handles both the wide format (Ingredient, Taste, Pairings) and pdf.py's
+    long format (Main, Pairing). As with the DataFrame lookups, the first row
+    wins for tastes; long-format pairings are collected per heading.
+    """
+    rows = {}
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        fields = reader.fieldnames or []
+        if 'Main' in fields and 'Pairing' in fields:
+            for row in reader:
+                main = normalize(row['Main'] or '')
+                pairing = normalize(row['Pairing'] or '')
+                if not main or not pairing:
+                    continue
+                rows.setdefault(main, ([], []))[1].append(pairing)
+        else:
+            taste_col = 'Taste (if app)' if 'Taste (if app)' in fields else 'Taste'
+            for row in reader:
+                ingredient = normalize(row['Ingredient'] or '')
+                if not ingredient or ingredient in rows:
+                    continue
+                rows[ingredient] = (split_items(row.get(taste_col) or ''), split_items(row['Pairings'] or ''))
+    return rows
+
+
+def source_fingerprint(csv_path):
+    """Size and mtime of the source CSV, used to tell when a compiled graph is stale."""
+    st = os.stat(csv_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _align(buf, alignment=8):
+    buf.extend(b'\0' * (-len(buf) % alignment))
+
+
+def _string_table(strings):
+    blobs = [sys.intern(s).encode('utf-8') for s in strings]
+    offsets = np.zeros(len(blobs) + 1, dtype=np.uint32)
+    np.cumsum([len(b) for b in blobs], out=offsets[1:])
+    return offsets, b''.join(blobs)
+
+
+@timed('csv_load_seconds', source='graph_compile')
+def compile_graph(csv_path, graph_path):
+    """Compiles csv_path into the binary graph format at graph_path."""
+    rows = read_source(csv_path)
+
+    # Intern every name, including pairings that don't have their own row
+    names = set(rows)
+    for _, pairings in rows.values():
+        names.update(pairings)
+    names = sorted(names)
+    ids = {name: i for i, name in enumerate(names)}
+
+    tastes = list(BASE_TASTES)
+    for taste_list, _ in rows.values():
+        for t in taste_list:
+            if t not in tastes:
+                tastes.append(t)
+    if len(tastes) > 64:
+        raise ValueError(f"{len(tastes)} distinct tastes do not fit in a 64-bit taste mask.")
+    bits = {t: i for i, t in enumerate(tastes)}
+
+    row_offsets = np.zeros(len(names) + 1, dtype=np.uint32)
+    neighbors = []
+    masks = np.zeros(len(names), dtype=np.uint64)
+    flags = np.zeros(len(names), dtype=np.uint8)
+    for i, name in enumerate(names):
+        if name in rows:
+            taste_list, pairings = rows[name]
+            flags[i] = 1
+            mask = 0
+            for t in taste_list:
+                mask |= 1 << bits[t]
+            masks[i] = mask
+            neighbors.extend(ids[p] for p in dict.fromkeys(pairings))
+        row_offsets[i + 1] = len(neighbors)
+    neighbors = np.asarray(neighbors, dtype=np.uint32)
+
+    name_offsets, name_blob = _string_table(names)
+    taste_offsets, taste_blob = _string_table(tastes)
+
+    body = bytearray()
+    offsets = []
+    for section in (name_offsets.tobytes(), name_blob, row_offsets.tobytes(), neighbors.tobytes(),
+                    masks.tobytes(), flags.tobytes(), taste_offsets.tobytes() + taste_blob):
+        _align(body)
+        offsets.append(HEADER.size + len(body))
+        body.extend(section)
+
+    size, mtime_ns = source_fingerprint(csv_path)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(names), len(neighbors), len(tastes),
+                         size, mtime_ns, *offsets)
+
+    write_atomic(graph_path, header, body)
+
+
+class _StringTable:
+    """Read-only sequence over a (offsets, utf-8 blob) table. Decodes entries on access."""
+
+    def __init__(self, buf, offsets, base):
+        self._buf = buf
+        self._offsets = offsets
+        self._base = base
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        return bytes(self._buf[self._base + start:self._base + end]).decode('utf-8')
+
+
+class PairingGraph:
+    """
+    A memory-mapped pairing graph.
+
+    Supports the same `get`/`in` lookups as algorithm.build_ingredient_index, so it
+    can be passed straight to algorithm.filter_pairings.
+    """
+
+    def __init__(self, graph_path):
+        with open(graph_path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = HEADER.unpack_from(self._mmap, 0)
+        magic, version, n_nodes, n_edges, n_tastes, size, mtime_ns = header[:7]
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"'{graph_path}' is not a version {FORMAT_VERSION} pairing graph.")
+        self.source_fingerprint = (size, mtime_ns)
+        names_at, blob_at, rows_at, nbrs_at, masks_at, flags_at, tastes_at = header[7:]
+
+        buf = self._mmap
+        self.row_offsets = np.frombuffer(buf, np.uint32, n_nodes + 1, rows_at)
+        self.neighbors = np.frombuffer(buf, np.uint32, n_edges, nbrs_at)
+        self.taste_masks = np.frombuffer(buf, np.uint64, n_nodes, masks_at)
+        self.has_row = np.frombuffer(buf, np.uint8, n_nodes, flags_at)
+
+        self.names = _StringTable(buf, np.frombuffer(buf, np.uint32, n_nodes + 1, names_at), blob_at)
+        taste_offsets = np.frombuffer(buf, np.uint32, n_tastes + 1, tastes_at)
+        taste_table = _StringTable(buf, taste_offsets, tastes_at + taste_offsets.nbytes)
+        self.tastes = [taste_table[i] for i in range(n_tastes)]
+
+    def __len__(self):
+        return int(self.has_row.sum())
+
+    def node_id(self, name):
+        """Returns the id of a normalized name, or None if it isn't in the graph."""
+        i = bisect.bisect_left(self.names, name)
+        if i < len(self.names) and self.names[i] == name:
+            return i
+        return None
+
+    def __contains__(self, name):
+        i = self.node_id(name)
+        return i is not None and bool(self.has_row[i])
+
+    def neighbor_ids(self, i):
+        return self.neighbors[self.row_offsets[i]:self.row_offsets[i + 1]]
+
+    def tastes_of(self, i):
+        mask = int(self.taste_masks[i])
+        return tuple(t for bit, t in enumerate(self.tastes) if mask >> bit & 1)
+
+    def get(self, name, default=None):
+        """Returns {'tastes': ..., 'pairings': [...]} for an ingredient with its own row."""
+        i = self.node_id(name)
+        if i is None or not self.has_row[i]:
+            inc('lookups_total', result='miss')
+            return default
+        inc('lookups_total', result='hit')
+        return {
+            'tastes': self.tastes_of(i),
+            'pairings': [self.names[j] for j in self.neighbor_ids(i)],
+        }
+
+    def ingredients(self):
+        """Yields every ingredient that has its own row."""
+        for i in np.flatnonzero(self.has_row):
+            yield self.names[i]
+
+
+def default_graph_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.pgraph'
+
+
+@timed('graph_load_seconds')
+def load_graph(csv_path='test4.csv', graph_path=None):
+    """
+    Memory-maps the compiled graph for csv_path, compiling it first if it is
+    missing, from an older format version, or stale relative to the CSV.
+    """
+    graph_path = graph_path or default_graph_path(csv_path)
+    if os.path.exists(graph_path):
+        try:
+            graph = PairingGraph(graph_path)
+        except (ValueError, struct.error):
+            graph = None
+        if graph is not None:
+            if not os.path.exists(csv_path) or graph.source_fingerprint == source_fingerprint(csv_path):
+                return graph
+    compile_graph(csv_path, graph_path)
+    return PairingGraph(graph_path)
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:] or ['test4.csv']:
+        compile_graph(path, default_graph_path(path))
+        graph = PairingGraph(default_graph_path(path))
+        print(f"{path} -> {default_graph_path(path)}: {len(graph.names)} names, "
+              f"{len(graph.neighbors)} pairings, {len(graph.tastes)} tastes")
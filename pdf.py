@@ -1,74 +1,378 @@
-import pandas as pd
+import argparse
+import csv
+import hashlib
+import os
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
 from pypdf import PdfReader
 
-# Read the PDF
-reader = PdfReader('FlavorBible.pdf')
+from atomic_file import write_atomic
+from metrics import inc, timer
 
-# Extract text while keeping the layout
-text_data = []
+PDF_PATH = 'FlavorBible.pdf'
+OUTPUT_CSV = 'flavor_bible_full.csv'
+CACHE_ROOT = '.pdf_cache'  # Extracted page text, one directory per PDF hash
 start_page = 64  # Page 43 in actual PDF (zero-based index)
 end_page = 1015  # Page 811
 
-for page_num in range(start_page, end_page):  
-    page = reader.pages[page_num]  
-    text = page.extract_text()
-    if text:
-        lines = text.split("\n")  # Split text into lines
-        text_data.extend([(page_num + 1, line.strip()) for line in lines])  # Store with correct page number
 
-# Create DataFrame
-df = pd.DataFrame(text_data, columns=['Page', 'Text'])
+def page_rows(page_num, text):
+    """Splits the text of one page into (Page, Text) rows, keeping the correct page number."""
+    if not text:
+        return []
+    lines = text.split("\n")  # Split text into lines
+    return [(page_num + 1, line.strip()) for line in lines]
+
+
+def pdf_cache_dir(pdf_path=PDF_PATH, cache_root=CACHE_ROOT):
+    """
+    Returns the page-text cache directory for a PDF, keyed by a hash of its contents,
+    so editing or replacing the PDF never reuses stale text.
+    """
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return os.path.join(cache_root, digest.hexdigest())
+
+
+def latest_cache_dir(cache_root=CACHE_ROOT):
+    """Returns the most recently written cache directory, for re-runs without the PDF."""
+    dirs = [os.path.join(cache_root, d) for d in os.listdir(cache_root)]
+    dirs = [d for d in dirs if os.path.isdir(d)]
+    if not dirs:
+        raise FileNotFoundError(f"No cached pages found in '{cache_root}'.")
+    return max(dirs, key=os.path.getmtime)
+
+
+def cached_page_text(cache_dir, page_num):
+    """Returns the cached text of a page, or None if it hasn't been extracted yet."""
+    try:
+        with open(os.path.join(cache_dir, f"{page_num}.txt"), encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def store_page_text(cache_dir, page_num, text):
+    """
+    Writes one page's text to the cache. The file is written under a temporary
+    name and renamed into place, so an interrupted run never leaves a half-written
+    page behind and the next run resumes from the last complete page.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    write_atomic(os.path.join(cache_dir, f"{page_num}.txt"), text)
+
+
+def missing_pages(cache_dir, start, end):
+    """Lists the pages in [start, end) that are not in the cache yet."""
+    if cache_dir is None or not os.path.isdir(cache_dir):
+        return list(range(start, end))
+    cached = set(os.listdir(cache_dir))
+    return [p for p in range(start, end) if f"{p}.txt" not in cached]
+
+
+def iter_page_texts(pdf_path, page_nums, cache_dir=None):
+    """
+    Yields (page_num, text) for the given pages, one page at a time.
+    When cache_dir is set, cached pages are read from disk and newly extracted
+    pages are written to it as soon as they are done.
+    """
+    reader = None
+    for page_num in page_nums:
+        text = cached_page_text(cache_dir, page_num) if cache_dir else None
+        if text is None:
+            if reader is None:
+                reader = PdfReader(pdf_path)
+            with timer('pdf_page_seconds'):
+                text = reader.pages[page_num].extract_text() or ''
+            inc('pdf_pages_total', source='pdf')
+            if cache_dir:
+                store_page_text(cache_dir, page_num, text)
+        else:
+            inc('pdf_pages_total', source='cache')
+        yield page_num, text
+
+
+def extract_page_texts(pdf_path, page_nums, cache_dir=None):
+    """Extracts the text of the given pages, returning [(page_num, text), ...]."""
+    return list(iter_page_texts(pdf_path, page_nums, cache_dir))
+
+
+def extract_pages(pdf_path=PDF_PATH, start=start_page, end=end_page, cache_dir=None):
+    """Extracts (Page, Text) rows for pages [start, end) one page at a time."""
+    text_data = []
+    for page_num, text in extract_page_texts(pdf_path, range(start, end), cache_dir):
+        text_data.extend(page_rows(page_num, text))
+    return text_data
+
+
+def load_cached_pages(cache_dir, start=start_page, end=end_page):
+    """Builds (Page, Text) rows from the cache alone, without opening the PDF."""
+    missing = missing_pages(cache_dir, start, end)
+    if missing:
+        raise FileNotFoundError(f"{len(missing)} page(s) are not cached yet, starting at page {missing[0]}.")
+    return extract_pages(None, start, end, cache_dir)
+
+
+def _extract_chunk(args):
+    """Worker for extract_pages_parallel. Each worker opens its own PdfReader."""
+    pdf_path, page_nums, cache_dir = args
+    return extract_page_texts(pdf_path, page_nums, cache_dir)
+
+
+def page_chunks(page_nums, n_chunks):
+    """Splits an ordered list of pages into at most n_chunks contiguous, ordered runs."""
+    n_chunks = max(1, min(n_chunks, len(page_nums)))
+    size, extra = divmod(len(page_nums), n_chunks)
+    chunks = []
+    lo = 0
+    for i in range(n_chunks):
+        hi = lo + size + (1 if i < extra else 0)
+        chunks.append(page_nums[lo:hi])
+        lo = hi
+    return chunks
+
+
+def extract_pages_parallel(pdf_path=PDF_PATH, start=start_page, end=end_page, workers=None, cache_dir=None):
+    """
+    Extracts (Page, Text) rows for pages [start, end) across a process pool.
+
+    Only pages missing from the cache are sent to the pool. They are split into
+    several chunks per worker so a slow chunk doesn't hold up the whole pool.
+    Rows come back in page order, so the output is identical to extract_pages().
+    """
+    workers = workers or os.cpu_count() or 1
+    todo = missing_pages(cache_dir, start, end)
+    if workers == 1 or len(todo) <= 1:
+        return extract_pages(pdf_path, start, end, cache_dir)
+
+    texts = {}
+    chunks = page_chunks(todo, workers * 4)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk_texts in pool.map(_extract_chunk, [(pdf_path, chunk, cache_dir) for chunk in chunks]):
+            texts.update(chunk_texts)
+
+    text_data = []
+    for page_num in range(start, end):
+        text = texts[page_num] if page_num in texts else cached_page_text(cache_dir, page_num)
+        text_data.extend(page_rows(page_num, text))
+    return text_data
 
-# Drop first 3 rows after extraction (adjust if needed)
-df = df.iloc[3:].reset_index(drop=True)
 
 # Define Heuristics
+HEADING_PATTERN = re.compile(r"^[A-Z]{3,}")  # First 3+ letters are uppercase
+PRONOUN_PATTERN = re.compile(r"\b(?:I|YOU|WE|THEY|THEIR|MY|OUR)\b", re.IGNORECASE)
+
+
 def is_heading(text, page_indents):
     """Checks if the line is a heading based on capitalization and indentation rules."""
     return (
-        bool(re.match(r"^[A-Z]{3,}", text))  # First 3+ letters are uppercase
+        bool(HEADING_PATTERN.match(text))  # First 3+ letters are uppercase
         and page_indents < 2  # Fewer than 2 indents on the page
         and not text.startswith("-")  # No leading dash
         and not text.startswith(" ")  # No indentation
     )
 
+
 def is_flavor(text, page_indents):
     """Checks if the line is a flavor based on indentation and dash rules."""
-    no_pronouns = not re.search(r"\b(I|YOU|WE|THEY|THEIR|MY|OUR)\b", text, re.IGNORECASE)
-    
+    no_pronouns = not PRONOUN_PATTERN.search(text)
+
     if page_indents < 2:
         return not text.startswith("-") and no_pronouns
     else:
         return text.startswith(" ") and not text.startswith("-") and no_pronouns
 
-# Identify Indents Per Page
-df["Indent"] = df["Text"].apply(lambda x: x.startswith(" "))
-df["Page_Indents"] = df.groupby("Page")["Indent"].transform("sum")
 
-# Classify Each Line
-df["Heading"] = df.apply(lambda row: is_heading(row["Text"], row["Page_Indents"]), axis=1)
-df["Flavor"] = df.apply(lambda row: is_flavor(row["Text"], row["Page_Indents"]), axis=1)
-df["Ignore"] = ~df["Heading"] & ~df["Flavor"]  # Anything that is neither heading nor flavor
+def lines_frame(text_data):
+    """Creates the (Page, Text) DataFrame and drops the first 3 rows after extraction (adjust if needed)."""
+    df = pd.DataFrame(text_data, columns=['Page', 'Text'])
+    return df.iloc[3:].reset_index(drop=True)
+
+
+def classify(text_data):
+    """
+    Turns extracted (Page, Text) rows into the tidy (Main, Pairing) DataFrame.
+
+    Same rules as is_heading/is_flavor, applied as whole-column operations.
+    """
+    df = lines_frame(text_data)
+    text = df["Text"]
+
+    # Identify Indents Per Page
+    indent = text.str.startswith(" ")
+    few_indents = indent.groupby(df["Page"]).transform("sum") < 2
+    dash = text.str.startswith("-")
+
+    # Classify Each Line
+    heading = text.str.match(HEADING_PATTERN) & few_indents & ~dash & ~indent
+    flavor = ~dash & ~text.str.contains(PRONOUN_PATTERN) & (few_indents | indent)
+
+    # Keep headings and flavors, and repeat each heading until the next heading appears
+    keep = heading | flavor
+    pairing = text[keep]
+    main = pairing.where(heading[keep]).ffill()
+
+    # Create Final Tidy DataFrame
+    tidy_flavors = pd.DataFrame({"Main": main, "Pairing": pairing}).reset_index(drop=True)
+    tidy_flavors = tidy_flavors[tidy_flavors["Main"] != tidy_flavors["Pairing"]]  # Remove self-pairing rows
+    return tidy_flavors
+
+
+def classify_rowwise(text_data):
+    """The original row-by-row classifier, kept to check and time classify() against."""
+    df = lines_frame(text_data)
+
+    # Identify Indents Per Page
+    df["Indent"] = df["Text"].apply(lambda x: x.startswith(" "))
+    df["Page_Indents"] = df.groupby("Page")["Indent"].transform("sum")
+
+    # Classify Each Line
+    df["Heading"] = df.apply(lambda row: is_heading(row["Text"], row["Page_Indents"]), axis=1)
+    df["Flavor"] = df.apply(lambda row: is_flavor(row["Text"], row["Page_Indents"]), axis=1)
+    df["Ignore"] = ~df["Heading"] & ~df["Flavor"]  # Anything that is neither heading nor flavor
+
+    # Filter Relevant Data
+    flavor_matches = df[~df["Ignore"]].reset_index(drop=True)
+
+    # Repeat each heading until the next heading appears
+    headings = []
+    current_heading = None
+    for heading, text in zip(flavor_matches["Heading"], flavor_matches["Text"]):
+        if heading:
+            current_heading = text
+        headings.append(current_heading)
+
+    # Create Final Tidy DataFrame
+    tidy_flavors = pd.DataFrame({"Main": headings, "Pairing": flavor_matches["Text"]})
+    tidy_flavors = tidy_flavors[tidy_flavors["Main"] != tidy_flavors["Pairing"]]  # Remove self-pairing rows
+    return tidy_flavors
+
 
-# Filter Relevant Data
-flavor_matches = df[~df["Ignore"]].reset_index(drop=True)
+def iter_tidy_rows(page_texts, skip_lines=3):
+    """
+    Streaming version of classify(): takes (page_num, text) pairs one page at a
+    time and yields (Main, Pairing) rows.
+
+    Only the current page's lines and the current heading are held in memory.
+    The first skip_lines lines of the book are dropped, same as classify().
+    """
+    current_heading = None
+    for page_num, text in page_texts:
+        lines = [line for _, line in page_rows(page_num, text)]
+        if skip_lines:
+            dropped = min(skip_lines, len(lines))
+            lines = lines[dropped:]
+            skip_lines -= dropped
+
+        page_indents = sum(line.startswith(" ") for line in lines)
+        for line in lines:
+            if is_heading(line, page_indents):
+                current_heading = line
+            elif not is_flavor(line, page_indents):
+                continue
+            if line != current_heading:  # Remove self-pairing rows
+                yield current_heading, line
+
+
+def write_tidy_csv(rows, output=OUTPUT_CSV):
+    """Appends (Main, Pairing) rows to the CSV as they arrive. Returns the number of rows written."""
+    count = 0
+    with open(output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerow(["Main", "Pairing"])
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def compare_classifiers(text_data):
+    """Times classify() against classify_rowwise() and checks they write the same CSV."""
+    t0 = time.perf_counter()
+    rowwise = classify_rowwise(text_data)
+    rowwise_elapsed = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    vectorized = classify(text_data)
+    vectorized_elapsed = time.perf_counter() - t0
+
+    print(f"Classified {len(text_data)} lines: row-wise {rowwise_elapsed:.3f}s, "
+          f"vectorized {vectorized_elapsed:.3f}s, speedup: {rowwise_elapsed / vectorized_elapsed:.1f}x")
+    if rowwise.to_csv(index=False) != vectorized.to_csv(index=False):
+        print("Warning: vectorized output differs from row-wise output.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract the Flavor Bible PDF into flavor_bible_full.csv")
+    parser.add_argument("--pdf", default=PDF_PATH)
+    parser.add_argument("--output", default=OUTPUT_CSV)
+    parser.add_argument("--start", type=int, default=start_page)
+    parser.add_argument("--end", type=int, default=end_page)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of extraction processes (0 = one per CPU, 1 = serial)")
+    parser.add_argument("--compare", action="store_true",
+                        help="also run the serial extraction and report the speedup (both sides skip the page cache)")
+    parser.add_argument("--compare-classify", action="store_true",
+                        help="also run the row-wise classifier and report the speedup")
+    parser.add_argument("--cache-root", default=CACHE_ROOT,
+                        help="directory holding the extracted page text")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always call extract_text() and don't write the page cache")
+    parser.add_argument("--from-cache", action="store_true",
+                        help="only re-run classification from cached pages, never open the PDF")
+    parser.add_argument("--stream", action="store_true",
+                        help="classify page by page and append rows to the CSV with flat memory use")
+    args = parser.parse_args()
+
+    workers = args.workers or os.cpu_count() or 1
+
+    t0 = time.perf_counter()
+    if args.from_cache:
+        if os.path.exists(args.pdf):
+            cache_dir = pdf_cache_dir(args.pdf, args.cache_root)
+        else:
+            cache_dir = latest_cache_dir(args.cache_root)
+    elif args.compare and not args.stream:
+        cache_dir = None  # Time extraction against extraction, not against reading cached pages
+    else:
+        cache_dir = None if args.no_cache else pdf_cache_dir(args.pdf, args.cache_root)
+
+    if args.stream:
+        if args.from_cache and missing_pages(cache_dir, args.start, args.end):
+            raise FileNotFoundError(f"Not every page is cached in '{cache_dir}'.")
+        page_texts = iter_page_texts(args.pdf, range(args.start, args.end), cache_dir)
+        count = write_tidy_csv(iter_tidy_rows(page_texts), args.output)
+        print(f"Streamed {count} rows to {args.output} in {time.perf_counter() - t0:.2f}s")
+        return
+
+    if args.from_cache:
+        text_data = load_cached_pages(cache_dir, args.start, args.end)
+        print(f"Loaded {args.end - args.start} pages from {cache_dir} in {time.perf_counter() - t0:.2f}s")
+    else:
+        n_missing = len(missing_pages(cache_dir, args.start, args.end))
+        text_data = extract_pages_parallel(args.pdf, args.start, args.end, workers, cache_dir)
+        elapsed = time.perf_counter() - t0
+        print(f"Extracted {n_missing} of {args.end - args.start} pages with {workers} worker(s) in {elapsed:.2f}s")
 
-# Create Headings Vector
-headings_vec = flavor_matches["Text"][flavor_matches["Heading"]].tolist()
+        if args.compare:
+            t0 = time.perf_counter()
+            serial_data = extract_pages(args.pdf, args.start, args.end)
+            serial_elapsed = time.perf_counter() - t0
+            print(f"Serial extraction: {serial_elapsed:.2f}s, speedup: {serial_elapsed / elapsed:.2f}x")
+            if serial_data != text_data:
+                print("Warning: parallel output differs from serial output.")
 
-# Repeat each heading until the next heading appears
-headings = []
-current_heading = None
-for is_heading, text in zip(flavor_matches["Heading"], flavor_matches["Text"]):
-    if is_heading:
-        current_heading = text
-    headings.append(current_heading)
+    if args.compare_classify:
+        compare_classifiers(text_data)
 
-# Create Final Tidy DataFrame
-tidy_flavors = pd.DataFrame({"Main": headings, "Pairing": flavor_matches["Text"]})
-tidy_flavors = tidy_flavors[tidy_flavors["Main"] != tidy_flavors["Pairing"]]  # Remove self-pairing rows
+    # Save to CSV
+    classify(text_data).to_csv(args.output, index=False)
 
-# Save to CSV
-tidy_flavors.to_csv("flavor_bible_full.csv", index=False)
 
+if __name__ == "__main__":
+    main()
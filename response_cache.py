@@ -0,0 +1,137 @@
+"""
+Disk-backed cache for Spoonacular responses.
+
+Responses are keyed by endpoint plus normalized parameters: the API key is
+left out, and ingredient lists are lowercased and sorted, so
+"Tomato, basil" and "basil,tomato" share one entry. Entries expire after a
+TTL, and the least recently used entries are evicted once the cache is full.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from metrics import inc
+
+CACHE_PATH = '.spoonacular_cache.sqlite3'
+DEFAULT_TTL = 24 * 60 * 60  # seconds
+DEFAULT_MAX_ENTRIES = 1000
+
+# Parameters that hold comma-separated ingredient lists
+LIST_PARAMS = {'ingredients', 'includeIngredients', 'excludeIngredients'}
+# Parameters that must never be part of the key
+EXCLUDED_PARAMS = {'apiKey'}
+
+
+def normalize_params(params):
+    """Returns the parameters as a sorted list of (name, value) pairs, ready to be used in a key."""
+    normalized = []
+    for name, value in params.items():
+        if name in EXCLUDED_PARAMS or value is None or value == '':
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ",".join(value)
+        if name in LIST_PARAMS:
+            value = ",".join(sorted(item.strip().lower() for item in str(value).split(',') if item.strip()))
+        elif isinstance(value, str):
+            value = value.strip().lower()
+        else:
+            value = str(value)
+        normalized.append((name, value))
+    return sorted(normalized)
+
+
+def cache_key(endpoint, params):
+    return json.dumps([endpoint, normalize_params(params)], separators=(',', ':'))
+
+
+class ResponseCache:
+    """
+    SQLite-backed response cache with TTL expiry, an LRU size cap and hit/miss counters.
+    The database is only opened on first use. Safe to share between threads.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        return self._conn
+
+    def get(self, endpoint, params):
+        """Returns the cached JSON response, or None on a miss or an expired entry."""
+        key = cache_key(endpoint, params)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    conn.commit()
+                self.misses += 1
+                inc('response_cache_total', result='miss')
+                return None
+            conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            inc('response_cache_total', result='hit')
+        return json.loads(row[0])
+
+    def put(self, endpoint, params, data):
+        """Stores a JSON response, evicting the least recently used entries past max_entries."""
+        key = cache_key(endpoint, params)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, json.dumps(data), now, now))
+            excess = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed LIMIT ?)", (excess,)
+                )
+                self.evictions += excess
+            conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._connect().execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """The cache shared by the search functions. Set SPOONACULAR_CACHE=0 to turn it off."""
+    global _default_cache
+    if os.environ.get("SPOONACULAR_CACHE", "1") == "0":
+        return None
+    if _default_cache is None:
+        _default_cache = ResponseCache(os.environ.get("SPOONACULAR_CACHE_PATH", CACHE_PATH))
+    return _default_cache
+
@@ -0,0 +1,104 @@
+"""
+Multi-attribute ingredient compatibility scoring.
+
+Batch version of jaccard.py's weighted score. Every attribute column (Taste,
+Function, Weight, Volume) is encoded as a multi-hot NumPy matrix, and
+intersections for all ingredient pairs come from one matrix product per
+attribute. From those:
+
+    similarity  Jaccard per attribute, averaged with the attribute weights
+    contrast    jaccard.normalize_contrast_score per attribute, 1 / (shared
+                values + 1): 1.0 when nothing is shared, lower the more is
+    total       jaccard_weight * similarity + contrast_weight * contrast
+"""
+import sys
+
+import numpy as np
+
+from algorithm import split_list
+
+ATTRIBUTES = ['Taste', 'Function', 'Weight', 'Volume']
+DEFAULT_ATTRIBUTE_WEIGHTS = {'Taste': 0.4, 'Function': 0.2, 'Weight': 0.2, 'Volume': 0.2}
+
+
+def encode_column(values):
+    """Multi-hot encodes a column of comma-separated cells. Returns (vocab, matrix)."""
+    rows = [[item.lower() for item in split_list(v)] for v in values]
+    vocab = sorted({item for row in rows for item in row})
+    col = {v: j for j, v in enumerate(vocab)}
+    matrix = np.zeros((len(rows), len(vocab)), dtype=np.float64)
+    for i, row in enumerate(rows):
+        matrix[i, [col[item] for item in row]] = 1
+    return vocab, matrix
+
+
+class CompatibilityScorer:
+    """
+    Scores every pair of ingredients from a normalized DataFrame (algorithm.load_dataset).
+    Attribute columns missing from the CSV are skipped.
+    """
+
+    def __init__(self, df, attribute_weights=None, jaccard_weight=0.5, contrast_weight=0.5):
+        df = df.drop_duplicates('Ingredient')  # First row wins, as in the other lookups
+        self.names = list(df['Ingredient'])
+        self._ids = {name: i for i, name in enumerate(self.names)}
+        weights = attribute_weights or DEFAULT_ATTRIBUTE_WEIGHTS
+        self.attribute_weights = {a: w for a, w in weights.items() if a in df.columns and w}
+        self.jaccard_weight = jaccard_weight
+        self.contrast_weight = contrast_weight
+        self.features = {a: encode_column(df[a]) for a in self.attribute_weights}
+
+    def _scores(self, rows):
+        """(similarity, contrast) arrays of shape (len(rows), n_ingredients)."""
+        total_weight = sum(self.attribute_weights.values())
+        similarity = np.zeros((len(rows), len(self.names)))
+        contrast = np.zeros((len(rows), len(self.names)))
+        for attr, weight in self.attribute_weights.items():
+            matrix = self.features[attr][1]
+            sizes = matrix.sum(axis=1)
+            inter = matrix[rows] @ matrix.T
+            union = sizes[rows, None] + sizes[None, :] - inter
+            has_values = union > 0
+            jac = np.divide(inter, union, out=np.zeros_like(inter), where=has_values)
+            con = np.where(has_values, 1.0 / (inter + 1.0), 0.0)
+            similarity += weight / total_weight * jac
+            contrast += weight / total_weight * con
+        # The weighted sums can land a rounding error past 1.0
+        return np.clip(similarity, 0.0, 1.0), np.clip(contrast, 0.0, 1.0)
+
+    def score_matrix(self):
+        """All-pairs {'similarity', 'contrast', 'total'} matrices, indexed like self.names."""
+        similarity, contrast = self._scores(np.arange(len(self.names)))
+        total = self.jaccard_weight * similarity + self.contrast_weight * contrast
+        return {'similarity': similarity, 'contrast': contrast, 'total': total}
+
+    def rank(self, ingredient, by='total', top=10):
+        """
+        Ranked matches for one ingredient, best first, as
+        [(other, {'total': ..., 'similarity': ..., 'contrast': ...}), ...].
+        `by` picks the score to sort on. Returns None if the ingredient is unknown.
+        """
+        i = self._ids.get(ingredient.lower().strip())
+        if i is None:
+            return None
+        similarity, contrast = (s[0] for s in self._scores(np.array([i])))
+        scores = {
+            'total': self.jaccard_weight * similarity + self.contrast_weight * contrast,
+            'similarity': similarity,
+            'contrast': contrast,
+        }
+        order = np.argsort(-scores[by], kind='stable')
+        order = order[order != i][:top]  # Never match an ingredient with itself
+        return [(self.names[j], {name: float(s[j]) for name, s in scores.items()}) for j in order]
+
+
+if __name__ == "__main__":
+    from dataset import get_dataframe
+
+    path = sys.argv[1] if len(sys.argv) > 1 else 'test4.csv'
+    ingredient = sys.argv[2] if len(sys.argv) > 2 else 'honey'
+    scorer = CompatibilityScorer(get_dataframe(path))
+    for by in ('total', 'similarity', 'contrast'):
+        print(f"Top matches for '{ingredient}' by {by}:")
+        for other, scores in scorer.rank(ingredient, by, top=5):
+            print(f"  {other}: " + ", ".join(f"{k} {v:.3f}" for k, v in scores.items()))
@@ -0,0 +1,205 @@
+"""
+Long-running local HTTP service for pairing lookups and recipe searches.
+
+Everything is loaded once at startup: the pairing index, the taste filter,
+the name resolver and the top-k similarity table. Requests are then plain
+lookups, each handled on its own thread. JSON over GET:
+
+    /pairings?ingredient=honey
+    /filter?ingredient=ginger&mode=contrast          (similar, contrast or all)
+    /similar?ingredient=honey&k=5
+    /recipes/complexSearch?query=pasta&ingredients=tomato&number=2
+    /recipes/findByIngredients?ingredients=apple,honey&number=5
+    /health
+    /metrics                                         (Prometheus text; run with FLAVOR_METRICS=1)
+
+    python service.py --port 8090 --dataset test4.csv
+    python service.py --dataset all      # every bundled CSV merged, edits picked up while running
+
+Ingredient names go through name_resolver.py, so "Tomatoes" answers for
+"tomato"; the response's "ingredient" field says which name was used. Recipe
+searches are proxied through combination.py's shared Spoonacular client.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+import metrics
+from batch import JobError, run_job
+from combination import API_KEY, SEARCH_FLIGHT
+from dataset import ALL_SOURCES, get_index, get_resolver, get_store, get_taste_filter
+from similarity import pairings_from_index, top_k_similar
+
+# Largest k the similarity table is precomputed for
+MAX_SIMILAR = 20
+
+
+class NotFound(Exception):
+    """A request for a path the service doesn't serve."""
+
+
+class UnknownIngredient(Exception):
+    """A request naming an ingredient that no dataset name resolves to."""
+
+
+class PairingService:
+    """
+    The preloaded data behind the HTTP handler. Thread-safe: everything is
+    read-only after __init__, except that with dataset='all' the resolver and
+    similarity table are rebuilt (and swapped in whole) when the merged store
+    has picked up an edited source.
+    """
+
+    def __init__(self, dataset=None, api_key=None):
+        self.api_key = api_key if api_key is not None else API_KEY
+        self.started = time.time()
+        self._rebuild_lock = threading.Lock()
+        if dataset == ALL_SOURCES:
+            self.store = self.index = get_store()
+            self.taste_filter = None  # filter_pairings reads the live store instead
+            self._rebuild()
+        else:
+            self.store = None
+            self.index = get_index(dataset)
+            self.taste_filter = get_taste_filter(dataset)
+            self.resolver = get_resolver(dataset)
+            self.similar = top_k_similar(pairings_from_index(self.index), k=MAX_SIMILAR)
+
+    def _rebuild(self):
+        from name_resolver import NameResolver
+
+        version = self.store.version
+        resolver = NameResolver(self.store)
+        similar = top_k_similar(pairings_from_index(self.store), k=MAX_SIMILAR)
+        self.resolver, self.similar, self._version = resolver, similar, version
+
+    def _check_store(self):
+        if self.store is None:
+            return
+        self.store.maybe_refresh()
+        if self.store.version != self._version:
+            with self._rebuild_lock:
+                if self.store.version != self._version:
+                    self._rebuild()
+
+    def _ingredient(self, params):
+        name = params.get('ingredient', '')
+        if not name.strip():
+            raise JobError("The 'ingredient' parameter is required.")
+        match, _ = self.resolver.resolve(name)
+        if match is None:
+            raise UnknownIngredient(f"No matching ingredient found for '{name.lower().strip()}'.")
+        return match
+
+    def handle(self, path, params):
+        """
+        Answers one request. Returns the JSON body; raises JobError,
+        UnknownIngredient, NotFound or a requests exception.
+        """
+        self._check_store()
+        if path == '/health':
+            return {'status': 'ok', 'ingredients': len(self.resolver.names),
+                    'uptime_s': round(time.time() - self.started, 1),
+                    'search_coalescing': SEARCH_FLIGHT.stats()}
+        if path == '/pairings':
+            ingredient = self._ingredient(params)
+            entry = self.index.get(ingredient)
+            if entry is None:  # Removed from the store since the resolver was built
+                raise UnknownIngredient(f"No matching ingredient found for '{ingredient}'.")
+            return {'ingredient': ingredient, 'pairings': list(entry['pairings'])}
+        if path == '/filter':
+            ingredient = self._ingredient(params)
+            job = {'op': 'filter', 'ingredient': ingredient, 'mode': params.get('mode', 'similar')}
+            return {'ingredient': ingredient, 'mode': job['mode'],
+                    'pairings': run_job(job, self.index, self.api_key, self.taste_filter)}
+        if path == '/similar':
+            ingredient = self._ingredient(params)
+            try:
+                k = int(params.get('k', 5))
+            except ValueError:
+                raise JobError("'k' must be an integer.")
+            if not 1 <= k <= MAX_SIMILAR:
+                raise JobError(f"'k' must be between 1 and {MAX_SIMILAR}.")
+            return {'ingredient': ingredient,
+                    'similar': [{'ingredient': other, 'jaccard': score}
+                                for other, score in self.similar.get(ingredient, [])[:k]]}
+        if path in ('/recipes/complexSearch', '/recipes/findByIngredients'):
+            job = dict(params, op=path.rsplit('/', 1)[1])
+            try:
+                job['number'] = int(params.get('number', 1))
+            except ValueError:
+                raise JobError("'number' must be an integer.")
+            return run_job(job, self.index, self.api_key)
+        raise NotFound(path)
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so load tests measure lookups rather than connects
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if url.path == '/metrics':
+            self._send_text(200, metrics.to_prometheus())
+            return
+        try:
+            self._send(200, self.server.service.handle(url.path, params))
+        except JobError as e:
+            self._send(400, {'error': str(e)})
+        except UnknownIngredient as e:
+            self._send(404, {'error': str(e)})
+        except NotFound:
+            self._send(404, {'error': f"Unknown path '{url.path}'."})
+        except requests.exceptions.RequestException as e:
+            self._send(502, {'error': f"Spoonacular request failed: {e}"})
+        except Exception as e:  # A bug in one request shouldn't drop the connection without a response
+            self._send(500, {'error': f"{type(e).__name__}: {e}"})
+
+    def _send(self, status, body):
+        self._send_bytes(status, json.dumps(body).encode('utf-8'), "application/json")
+
+    def _send_text(self, status, text):
+        self._send_bytes(status, text.encode('utf-8'), "text/plain; version=0.0.4")
+
+    def _send_bytes(self, status, payload, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_service(port=0, dataset=None, api_key=None):
+    """Loads the data, starts the service on a background thread and returns the server (see server.base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), ServiceHandler)
+    server.daemon_threads = True
+    server.service = PairingService(dataset, api_key)
+    server.base_url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local pairing lookup service")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--dataset", default=None,
+                        help=f"ingredient CSV (default: dataset.DEFAULT_DATASET), or '{ALL_SOURCES}' for every "
+                             f"bundled source merged")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    server = start_service(args.port, args.dataset)
+    print(f"Pairing service listening on {server.base_url} (loaded in {time.perf_counter() - t0:.2f}s)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
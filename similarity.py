@@ -0,0 +1,90 @@
+"""
+All-pairs pairing similarity.
+
+Batch version of pairing.compare_similarity: every ingredient's pairing list
+becomes a row of a sparse binary matrix, one sparse product gives the
+intersection size for every pair, and Jaccard follows from the row sizes.
+"""
+import sys
+import time
+
+import numpy as np
+from scipy import sparse
+
+from metrics import timed
+
+
+def pairings_from_index(index):
+    """Turns an algorithm.build_ingredient_index / PairingGraph style index into {ingredient: pairings}."""
+    names = index.ingredients() if hasattr(index, 'ingredients') else index
+    return {name: index.get(name)['pairings'] for name in names}
+
+
+def pairing_matrix(ingredient_pairings):
+    """
+    Encodes {ingredient: pairings} as a sparse binary matrix.
+    Returns (names, matrix) where row i of matrix is the pairing set of names[i].
+    """
+    names = list(ingredient_pairings)
+    vocab = {}
+    rows, cols = [], []
+    for i, name in enumerate(names):
+        for p in set(ingredient_pairings[name]):
+            rows.append(i)
+            cols.append(vocab.setdefault(p, len(vocab)))
+    data = np.ones(len(rows), dtype=np.int32)
+    matrix = sparse.csr_matrix((data, (rows, cols)), shape=(len(names), len(vocab)))
+    return names, matrix
+
+
+def all_pairs_jaccard(matrix):
+    """
+    Jaccard similarity of every pair of rows, as a sparse matrix.
+    Pairs with no shared pairings are left out (their score is 0).
+    """
+    intersections = (matrix @ matrix.T).tocoo()
+    sizes = np.asarray(matrix.sum(axis=1)).ravel()
+    inter = intersections.data.astype(np.float64)
+    union = sizes[intersections.row] + sizes[intersections.col] - inter
+    scores = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+    return sparse.csr_matrix((scores, (intersections.row, intersections.col)), shape=intersections.shape)
+
+
+@timed('jaccard_seconds', kind='all_pairs')
+def top_k_similar(ingredient_pairings, k=5):
+    """
+    Returns {ingredient: [(other_ingredient, jaccard), ...]} with the k most similar
+    ingredients for every ingredient, best first. Ties are broken by name.
+    """
+    names, matrix = pairing_matrix(ingredient_pairings)
+    jaccard = all_pairs_jaccard(matrix)
+    jaccard.setdiag(0)
+    jaccard.eliminate_zeros()
+
+    results = {}
+    for i, name in enumerate(names):
+        start, end = jaccard.indptr[i], jaccard.indptr[i + 1]
+        cols = jaccard.indices[start:end]
+        scores = jaccard.data[start:end]
+        if len(cols) > k:
+            # Keep everything tied with the k-th best score, then sort that small slice
+            cutoff = np.partition(scores, len(scores) - k)[len(scores) - k]
+            keep = scores >= cutoff
+            cols, scores = cols[keep], scores[keep]
+        ranked = sorted(zip(scores.tolist(), (names[j] for j in cols)), key=lambda x: (-x[0], x[1]))
+        results[name] = [(other, score) for score, other in ranked[:k]]
+    return results
+
+
+if __name__ == "__main__":
+    from pairing_graph import load_graph
+
+    for path in sys.argv[1:] or ['test4.csv']:
+        ingredient_pairings = pairings_from_index(load_graph(path))
+
+        t0 = time.perf_counter()
+        top = top_k_similar(ingredient_pairings, k=5)
+        elapsed = time.perf_counter() - t0
+        print(f"{path}: top-5 for {len(top)} ingredients in {elapsed:.3f}s")
+        for name in list(top)[:3]:
+            print(f"  {name}: {top[name]}")
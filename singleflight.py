@@ -0,0 +1,91 @@
+"""
+Request coalescing ("single flight").
+
+When several callers ask for the same key while a call for it is already
+running, only the first caller (the leader) runs it. The others wait for the
+leader and get the same result, or the same exception. Nothing is kept once
+the call finishes; response_cache.py handles caching.
+
+Threads and asyncio tasks share one table of in-flight calls, each backed by
+a concurrent.futures.Future. Threads block on it, and coroutines await it
+without tying up a thread, so a coroutine can join a call a thread started
+and the other way round. The worker thread completes the shared future
+itself, and coroutines only await it through asyncio.shield, so cancelling
+one waiting task (the leader included) never cancels the call for the others.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with equal keys. Safe to share between threads and event loops."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.calls = 0
+        self.executions = 0
+
+    def _join(self, key):
+        """Returns (future, is_leader) for key, registering a new call if none is running."""
+        with self._lock:
+            self.calls += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._in_flight[key] = future
+            self.executions += 1
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            del self._in_flight[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _run(self, key, future, func, *args, **kwargs):
+        """Runs the leader's call and completes the shared future with its outcome."""
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def do(self, key, func, *args, **kwargs):
+        """Runs func(*args, **kwargs) unless a call for key is already running, in which case waits for it."""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        return self._run(key, future, func, *args, **kwargs)
+
+    async def do_async(self, key, func, *args, **kwargs):
+        """
+        Async variant of do() for blocking functions. The leader starts func on
+        a worker thread; it and the followers all await the shared future.
+        """
+        future, leader = self._join(key)
+        if leader:
+            call = functools.partial(self._run, key, future, func, *args, **kwargs)
+            worker = asyncio.get_running_loop().run_in_executor(None, call)
+            # The outcome is read from the shared future; this only keeps it from being logged as unretrieved
+            worker.add_done_callback(lambda f: f.cancelled() or f.exception())
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def stats(self):
+        """Calls seen, calls actually executed, calls served by someone else's execution, and their ratio."""
+        with self._lock:
+            coalesced = self.calls - self.executions
+            return {
+                'calls': self.calls,
+                'executions': self.executions,
+                'coalesced': coalesced,
+                'dedup_ratio': coalesced / self.calls if self.calls else 0.0,
+                'in_flight': len(self._in_flight),
+            }
@@ -0,0 +1,179 @@
+"""
+Shared HTTP client for the Spoonacular API.
+
+One pooled requests.Session (keep-alive, so repeated calls reuse the same
+TCP+TLS connection) behind the search functions in combination.py and
+api_test.py, with:
+
+- bounded retries with jittered exponential backoff on connection errors,
+  429 and 5xx responses (Retry-After is honoured when present, up to the
+  backoff cap)
+- a token-bucket limiter so we never send faster than our plan allows
+- the response cache from response_cache.py in front of it all
+
+Rate and base URL can be set from the environment (SPOONACULAR_RATE_LIMIT,
+SPOONACULAR_BURST, SPOONACULAR_BASE_URL), e.g. to point at spoonacular_stub.py.
+"""
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import inc, timer
+from response_cache import get_default_cache
+
+BASE_URL = os.environ.get("SPOONACULAR_BASE_URL", "https://api.spoonacular.com")
+
+# Our plan allows 60 requests per minute; allow a short burst on top of that
+DEFAULT_RATE = float(os.environ.get("SPOONACULAR_RATE_LIMIT", "1.0"))  # requests per second
+DEFAULT_BURST = int(os.environ.get("SPOONACULAR_BURST", "5"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+USE_DEFAULT_CACHE = object()
+
+
+class TokenBucket:
+    """Thread-safe token bucket. acquire() blocks until a token is available."""
+
+    def __init__(self, rate, capacity):
+        if rate <= 0:
+            raise ValueError(f"Token bucket rate must be positive, not {rate}.")
+        if capacity < 1:
+            raise ValueError(f"Token bucket capacity must be at least 1, not {capacity}.")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class SpoonacularClient:
+    """
+    Pooled, rate-limited, retrying GET client. Safe to share between threads.
+
+    Errors surface as requests.exceptions.RequestException once the retries are
+    used up, same as a bare requests.get + raise_for_status.
+    """
+
+    def __init__(self, base_url=BASE_URL, rate=DEFAULT_RATE, burst=DEFAULT_BURST, max_retries=3,
+                 backoff_base=0.5, backoff_max=8.0, timeout=10, pool_size=10, cache=USE_DEFAULT_CACHE):
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.cache = get_default_cache() if cache is USE_DEFAULT_CACHE else cache
+        self.limiter = TokenBucket(rate, burst) if rate else None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.requests_sent = 0
+        self.retries = 0
+        self.errors = 0
+        self.quota_left = None  # from the X-API-Quota-Left header, when Spoonacular sends it
+        self._stats_lock = threading.Lock()
+
+    def url(self, endpoint):
+        """Accepts either a full URL or a path such as '/recipes/complexSearch'."""
+        return endpoint if "://" in endpoint else f"{self.base_url}{endpoint}"
+
+    def backoff(self, attempt, response=None):
+        """Seconds to wait before retry number `attempt` (1-based). Never more than backoff_max."""
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            return min(self.backoff_max, float(response.headers["Retry-After"]))
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(0, delay)  # Full jitter
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+        inc(f"api_{name}_total")
+
+    def get_json(self, endpoint, params):
+        """GETs endpoint and returns the decoded JSON, using the cache when possible."""
+        url = self.url(endpoint)
+        if self.cache is not None:
+            data = self.cache.get(url, params)
+            if data is not None:
+                return data
+
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                self.limiter.acquire()
+            self._count("requests_sent")
+            response = None
+            try:
+                with timer('api_request_seconds', endpoint=url.rsplit('/', 1)[-1]):
+                    response = self.session.get(url, params=params, timeout=self.timeout)
+                quota_left = response.headers.get("X-API-Quota-Left")
+                if quota_left is not None:
+                    self.quota_left = float(quota_left)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    data = response.json()
+                    break
+                failure = requests.exceptions.HTTPError(
+                    f"{response.status_code} Error for url: {response.url}", response=response)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                failure = e
+            except requests.exceptions.RequestException:
+                self._count("errors")
+                raise
+
+            attempt += 1
+            if attempt > self.max_retries:
+                self._count("errors")
+                raise failure
+            self._count("retries")
+            time.sleep(self.backoff(attempt, response))
+
+        if self.cache is not None:
+            self.cache.put(url, params, data)
+        return data
+
+    def stats(self):
+        return {
+            'requests_sent': self.requests_sent,
+            'retries': self.retries,
+            'errors': self.errors,
+            'quota_left': self.quota_left,
+        }
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client():
+    """The client shared by every search function in the process."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = SpoonacularClient()
+    return _default_client
+
+
+def set_default_client(client):
+    """Replaces the shared client, e.g. with one pointed at spoonacular_stub.py."""
+    global _default_client
+    with _default_client_lock:
+        _default_client = client
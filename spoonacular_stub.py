@@ -0,0 +1,126 @@
+"""
+Local stand-in for the Spoonacular API, for load tests and for checking the
+client's retry and rate-limit handling without spending quota.
+
+Serves /recipes/complexSearch and /recipes/findByIngredients with made-up but
+deterministic recipes, and can inject latency and errors:
+
+    python spoonacular_stub.py --port 8089 --latency 0.05 --error-rate 0.2
+    SPOONACULAR_BASE_URL=http://127.0.0.1:8089 python combination.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Ingredients the fake recipes pick their missed ingredients from
+PANTRY = ["honey", "ginger", "cucumber", "turmeric", "apple", "chili pepper", "yogurt", "basil",
+          "almonds", "cinnamon", "salmon", "mushroom", "lemon", "beef", "tomato", "coriander",
+          "avocado", "black pepper", "onion", "garlic", "butter", "cream", "thyme", "rice"]
+
+
+def _ingredient(name, i):
+    return {"id": i, "name": name, "original": f"1 cup {name}", "amount": 1.0, "unit": "cup"}
+
+
+def fake_recipes(seed_text, number, wanted=()):
+    """Builds `number` deterministic recipes for a query or ingredient list."""
+    rng = random.Random(zlib.crc32(seed_text.encode('utf-8')))
+    recipes = []
+    for n in range(number):
+        used = [w for w in wanted if rng.random() < 0.7]
+        missed = rng.sample([p for p in PANTRY if p not in wanted], rng.randint(0, 4))
+        recipes.append({
+            "id": rng.randint(1, 10**6),
+            "title": f"{seed_text.title() or 'Recipe'} #{n + 1}",
+            "image": f"https://img.example/{n}.jpg",
+            "usedIngredientCount": len(used),
+            "missedIngredientCount": len(missed),
+            "usedIngredients": [_ingredient(u, i) for i, u in enumerate(used)],
+            "missedIngredients": [_ingredient(m, i) for i, m in enumerate(missed)],
+            "likes": rng.randint(0, 500),
+        })
+    return recipes
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        if server.error_rate and random.random() < server.error_rate:
+            self._send(server.error_status, {"status": "failure", "message": "injected error"},
+                       {"Retry-After": server.retry_after} if server.error_status == 429 else None)
+            return
+
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        number = int(params.get("number", 1))
+        if url.path == "/recipes/complexSearch":
+            wanted = [i.strip().lower() for i in params.get("includeIngredients", "").split(",") if i.strip()]
+            results = fake_recipes(params.get("query", ""), number, wanted)
+            body = {"results": results, "offset": 0, "number": number, "totalResults": number}
+        elif url.path == "/recipes/findByIngredients":
+            wanted = [i.strip().lower() for i in params.get("ingredients", "").split(",") if i.strip()]
+            body = fake_recipes(",".join(wanted), number, wanted)
+        else:
+            self._send(404, {"status": "failure", "message": "not found"})
+            return
+        self._send(200, body, {"X-API-Quota-Left": "150"})
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(port=0, latency=0.0, error_rate=0.0, error_status=503, retry_after=0):
+    """
+    Starts the stub on a background thread and returns the server. Its URL is
+    server.base_url. Injected 429s carry a Retry-After of retry_after seconds.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.error_rate = error_rate
+    server.error_status = error_status
+    server.retry_after = str(retry_after)
+    server.request_count = 0
+    server.lock = threading.Lock()
+    server.base_url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Spoonacular stub server")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    args = parser.parse_args()
+
+    server = start_stub(args.port, args.latency, args.error_rate, args.error_status)
+    print(f"Spoonacular stub listening on {server.base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
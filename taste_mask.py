@@ -0,0 +1,145 @@
+"""
+Taste-compatibility bitmasks for the similar/contrast filter.
+
+Every taste in flavor_pairings gets a fixed bit (sweet=0, sour=1, salty=2,
+bitter=3, umami=4, the same low bits pairing_graph.py uses). The similar and
+contrast rules are precompiled into a lookup table from "tastes of the chosen
+ingredient" to "tastes a pairing needs at least one of". Filtering is then a
+bitwise AND over an integer array, for one ingredient or all of them at once.
+
+Tastes that are not in flavor_pairings can never match a rule; they are
+counted in TasteFilter.unknown_tastes instead of being warned about per row.
+"""
+from collections import Counter
+
+import numpy as np
+
+from algorithm import flavor_pairings
+from metrics import timed
+
+TASTE_BITS = {taste: bit for bit, taste in enumerate(flavor_pairings)}
+KNOWN_MASK = (1 << len(TASTE_BITS)) - 1
+
+# Menu choices from algorithm.py
+FLAVOR_KEYS = {'1': 'Flavor_profile_similar', '2': 'Flavor_profile_contrast'}
+
+
+def encode_tastes(tastes, unknown=None):
+    """Encodes taste names as a bitmask. Unknown tastes are added to the `unknown` Counter if given."""
+    mask = 0
+    for t in tastes:
+        bit = TASTE_BITS.get(t)
+        if bit is None:
+            if unknown is not None:
+                unknown[t] += 1
+        else:
+            mask |= 1 << bit
+    return mask
+
+
+def rule_table(flavor_key):
+    """
+    Lookup table of len 2**n_tastes: entry m is the mask of tastes that count as
+    a match for an ingredient whose tastes are m, under the given rule.
+    """
+    per_taste = [encode_tastes(flavor_pairings[t][flavor_key]) for t in TASTE_BITS]
+    table = np.zeros(KNOWN_MASK + 1, dtype=np.int64)
+    for m in range(1, KNOWN_MASK + 1):
+        low = m & -m  # Reuse the entry without the lowest set bit
+        table[m] = table[m ^ low] | per_taste[low.bit_length() - 1]
+    return table
+
+
+RULE_TABLES = {choice: rule_table(key) for choice, key in FLAVOR_KEYS.items()}
+
+
+def rules_for(choice):
+    """
+    The rule table for a menu choice, '1' (similar) or '2' (contrast). Raises
+    ValueError for anything else, '3' included: all pairings need no filter.
+    """
+    table = RULE_TABLES.get(choice)
+    if table is None:
+        raise ValueError(f"Flavor choice must be '1' (similar) or '2' (contrast), not {choice!r}.")
+    return table
+
+
+class TasteFilter:
+    """
+    Vectorized similar/contrast filter over an algorithm.py index or a PairingGraph.
+
+    Holds the pairings as CSR arrays (row_offsets, neighbors) over ingredient ids
+    plus one taste mask per ingredient.
+    """
+
+    def __init__(self, index):
+        self.unknown_tastes = Counter()
+        if hasattr(index, 'row_offsets'):
+            self._from_graph(index)
+        else:
+            self._from_dict(index)
+        self._ids = {name: i for i, name in enumerate(self.names)}
+        self._sources = np.repeat(np.arange(len(self.names)), np.diff(self.row_offsets))
+
+    def _from_graph(self, graph):
+        self.names = [graph.names[i] for i in range(len(graph.names))]
+        self.masks = (graph.taste_masks & np.uint64(KNOWN_MASK)).astype(np.int64)
+        self.row_offsets = graph.row_offsets.astype(np.int64)
+        self.neighbors = graph.neighbors.astype(np.int64)
+        self.has_row = graph.has_row.astype(bool)
+        for bit in range(len(TASTE_BITS), len(graph.tastes)):
+            count = int(np.count_nonzero(graph.taste_masks & np.uint64(1 << bit)))
+            if count:
+                self.unknown_tastes[graph.tastes[bit]] += count
+
+    def _from_dict(self, index):
+        self.names = list(index)
+        ids = {name: i for i, name in enumerate(self.names)}
+        self.masks = np.array([encode_tastes(index[n]['tastes'], self.unknown_tastes) for n in self.names],
+                              dtype=np.int64)
+        offsets, neighbors = [0], []
+        for name in self.names:
+            # Pairings without a row of their own can never match, so they're left out
+            neighbors.extend(ids[p] for p in index[name]['pairings'] if p in ids)
+            offsets.append(len(neighbors))
+        self.row_offsets = np.array(offsets, dtype=np.int64)
+        self.neighbors = np.array(neighbors, dtype=np.int64)
+        self.has_row = np.ones(len(self.names), dtype=bool)
+
+    def target_mask(self, i, choice):
+        return int(rules_for(choice)[self.masks[i]])
+
+    @timed('taste_filter_seconds', kind='one')
+    def filter(self, ingredient, choice):
+        """
+        Same answer as algorithm.filter_pairings: the pairings of `ingredient` that
+        match the flavor choice ('1' similar, '2' contrast). None if the ingredient is unknown.
+        Raises ValueError for any other choice.
+        """
+        rules = rules_for(choice)
+        i = self._ids.get(ingredient.lower().strip())
+        if i is None or not self.has_row[i]:
+            return None
+        nbrs = self.neighbors[self.row_offsets[i]:self.row_offsets[i + 1]]
+        keep = self.has_row[nbrs] & (self.masks[nbrs] & int(rules[self.masks[i]]) != 0)
+        return [self.names[j] for j in nbrs[keep]]
+
+    def edge_mask(self, choice):
+        """
+        Boolean array over every (ingredient, pairing) edge: True where the pairing
+        passes the filter. Raises ValueError for choices other than '1' and '2'.
+        """
+        targets = rules_for(choice)[self.masks[self._sources]]
+        return self.has_row[self.neighbors] & (self.masks[self.neighbors] & targets != 0)
+
+    @timed('taste_filter_seconds', kind='all')
+    def filter_all(self, choice):
+        """Runs the filter for every ingredient in one pass. Returns {ingredient: [pairings]}."""
+        keep = self.edge_mask(choice)
+        kept_sources = self._sources[keep]
+        kept_neighbors = self.neighbors[keep]
+        bounds = np.searchsorted(kept_sources, np.arange(len(self.names) + 1))
+        return {
+            self.names[i]: [self.names[j] for j in kept_neighbors[bounds[i]:bounds[i + 1]]]
+            for i in np.flatnonzero(self.has_row)
+        }
@@ -0,0 +1,116 @@
+"""
+Tests for response_cache.py, run against spoonacular_stub.py so no quota is spent.
+
+    python -m pytest test_response_cache.py
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from response_cache import ResponseCache, cache_key
+from spoonacular_client import SpoonacularClient
+from spoonacular_stub import start_stub
+
+
+class FakeClock:
+    """Stands in for time.time() so TTL and LRU order don't depend on the wall clock."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class CacheKeyTest(unittest.TestCase):
+
+    def test_ingredient_order_and_case_share_a_key(self):
+        a = cache_key("/recipes/findByIngredients", {"ingredients": "Tomato, basil", "number": 1})
+        b = cache_key("/recipes/findByIngredients", {"ingredients": "basil,tomato", "number": "1"})
+        self.assertEqual(a, b)
+
+    def test_api_key_is_excluded(self):
+        a = cache_key("/recipes/complexSearch", {"query": "pasta", "apiKey": "one"})
+        b = cache_key("/recipes/complexSearch", {"query": "pasta", "apiKey": "two"})
+        self.assertEqual(a, b)
+        self.assertNotIn("one", a)
+
+    def test_different_queries_differ(self):
+        a = cache_key("/recipes/complexSearch", {"query": "pasta"})
+        b = cache_key("/recipes/complexSearch", {"query": "soup"})
+        self.assertNotEqual(a, b)
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite3")
+        self.clock = FakeClock()
+        patcher = mock.patch("response_cache.time.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hits_and_misses_are_counted(self):
+        cache = ResponseCache(self.path)
+        self.assertIsNone(cache.get("/e", {"query": "pasta"}))
+        cache.put("/e", {"query": "pasta"}, {"results": [1]})
+        self.assertEqual(cache.get("/e", {"query": "Pasta ", "apiKey": "x"}), {"results": [1]})
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_entries_expire_after_ttl(self):
+        cache = ResponseCache(self.path, ttl=60)
+        cache.put("/e", {"query": "pasta"}, {"results": []})
+        self.clock.now += 59
+        self.assertIsNotNone(cache.get("/e", {"query": "pasta"}))
+        self.clock.now += 2
+        self.assertIsNone(cache.get("/e", {"query": "pasta"}))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResponseCache(self.path, max_entries=2)
+        for query in ("a", "b"):
+            cache.put("/e", {"query": query}, query)
+            self.clock.now += 1
+        cache.get("/e", {"query": "a"})  # "b" is now the least recently used
+        self.clock.now += 1
+        cache.put("/e", {"query": "c"}, "c")
+        self.assertIsNone(cache.get("/e", {"query": "b"}))
+        self.assertEqual(cache.get("/e", {"query": "a"}), "a")
+        self.assertEqual(cache.get("/e", {"query": "c"}), "c")
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+
+class ClientCacheTest(unittest.TestCase):
+    """The client in front of the local stub: equivalent requests reach the server once."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.stub = start_stub()
+        self.cache = ResponseCache(os.path.join(self.tmp.name, "cache.sqlite3"))
+        self.client = SpoonacularClient(base_url=self.stub.base_url, rate=0, cache=self.cache)
+
+    def tearDown(self):
+        self.stub.shutdown()
+        self.stub.server_close()
+        self.tmp.cleanup()
+
+    def test_equivalent_requests_are_served_from_cache(self):
+        endpoint = "/recipes/findByIngredients"
+        first = self.client.get_json(endpoint, {"ingredients": "Apple,honey", "number": 2, "apiKey": "k1"})
+        second = self.client.get_json(endpoint, {"ingredients": "honey, apple", "number": 2, "apiKey": "k2"})
+        self.assertEqual(first, second)
+        self.assertEqual(self.stub.request_count, 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+        self.client.get_json(endpoint, {"ingredients": "honey", "number": 2})
+        self.assertEqual(self.stub.request_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Tests for singleflight.py.
+
+    python -m pytest test_singleflight.py
+"""
+import asyncio
+import threading
+import unittest
+
+from singleflight import SingleFlight
+
+
+class SingleFlightAsyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.release = threading.Event()
+        self.runs = 0
+
+    def slow_lookup(self, value):
+        self.runs += 1
+        self.release.wait(5)
+        return value
+
+    def test_followers_share_the_leaders_call(self):
+        async def scenario():
+            tasks = [asyncio.create_task(self.flight.do_async('k', self.slow_lookup, 42)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            self.release.set()
+            return await asyncio.gather(*tasks)
+
+        self.assertEqual(asyncio.run(scenario()), [42, 42, 42])
+        self.assertEqual(self.runs, 1)
+        self.assertEqual(self.flight.stats()['coalesced'], 2)
+
+    def test_cancelling_the_leader_does_not_cancel_followers(self):
+        async def scenario():
+            leader = asyncio.create_task(self.flight.do_async('k', self.slow_lookup, 42))
+            await asyncio.sleep(0.05)
+            follower = asyncio.create_task(self.flight.do_async('k', self.slow_lookup, 42))
+            await asyncio.sleep(0.05)
+            leader.cancel()
+            await asyncio.sleep(0.05)
+            self.release.set()
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return await follower
+
+        self.assertEqual(asyncio.run(scenario()), 42)
+        self.assertEqual(self.runs, 1)
+        self.assertEqual(self.flight.stats()['in_flight'], 0)
+
+    def test_errors_reach_every_caller(self):
+        def fail():
+            self.release.wait(5)
+            raise ValueError("boom")
+
+        async def scenario():
+            tasks = [asyncio.create_task(self.flight.do_async('k', fail)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            self.release.set()
+            return await asyncio.gather(*tasks, return_exceptions=True)
+
+        results = asyncio.run(scenario())
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Tests for spoonacular_client.py's retries, backoff and rate limiting, run
+against spoonacular_stub.py so no quota is spent.
+
+    python -m pytest test_spoonacular_client.py
+"""
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+from spoonacular_client import SpoonacularClient, TokenBucket
+from spoonacular_stub import start_stub
+
+ENDPOINT = "/recipes/findByIngredients"
+PARAMS = {"ingredients": "apple,honey", "number": 2}
+
+
+class ClientTest(unittest.TestCase):
+
+    def start(self, **stub_options):
+        stub = start_stub(**stub_options)
+        self.addCleanup(stub.server_close)
+        self.addCleanup(stub.shutdown)
+        return stub
+
+    def client(self, stub, **options):
+        options = dict({'rate': 0, 'cache': None, 'max_retries': 3, 'backoff_base': 0.001}, **options)
+        return SpoonacularClient(base_url=stub.base_url, **options)
+
+    def test_server_errors_are_retried_then_raised(self):
+        stub = self.start(error_rate=1.0, error_status=503)
+        client = self.client(stub)
+        with self.assertRaises(requests.exceptions.HTTPError) as caught:
+            client.get_json(ENDPOINT, PARAMS)
+        self.assertEqual(caught.exception.response.status_code, 503)
+        self.assertEqual(stub.request_count, 4)
+        self.assertEqual(client.stats()['retries'], 3)
+        self.assertEqual(client.stats()['errors'], 1)
+
+    def test_retry_recovers_once_the_server_does(self):
+        stub = self.start(error_rate=1.0, error_status=503)
+        client = self.client(stub)
+
+        def heal(attempt, response=None):
+            stub.error_rate = 0.0
+            return 0
+
+        with mock.patch.object(client, 'backoff', side_effect=heal):
+            self.assertEqual(len(client.get_json(ENDPOINT, PARAMS)), 2)
+        self.assertEqual(stub.request_count, 2)
+        self.assertEqual(client.stats()['quota_left'], 150.0)
+
+    def test_client_errors_are_not_retried(self):
+        stub = self.start(error_rate=1.0, error_status=402)
+        client = self.client(stub)
+        with self.assertRaises(requests.exceptions.HTTPError):
+            client.get_json(ENDPOINT, PARAMS)
+        self.assertEqual(stub.request_count, 1)
+        self.assertEqual(client.stats()['retries'], 0)
+
+    def test_retry_after_is_capped_at_backoff_max(self):
+        stub = self.start(error_rate=1.0, error_status=429, retry_after=3600)
+        client = self.client(stub, max_retries=2, backoff_max=0.01)
+        t0 = time.perf_counter()
+        with self.assertRaises(requests.exceptions.HTTPError):
+            client.get_json(ENDPOINT, PARAMS)
+        self.assertLess(time.perf_counter() - t0, 5)
+        self.assertEqual(stub.request_count, 3)
+
+    def test_requests_are_rate_limited(self):
+        stub = self.start()
+        client = self.client(stub, rate=20, burst=1)
+        t0 = time.perf_counter()
+        for n in range(5):
+            client.get_json(ENDPOINT, dict(PARAMS, number=n + 1))
+        # One token up front, then one every 1/20s
+        self.assertGreaterEqual(time.perf_counter() - t0, 0.18)
+        self.assertEqual(stub.request_count, 5)
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def test_rejects_settings_that_would_block_forever(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(1.0, 0)
+        with self.assertRaises(ValueError):
+            TokenBucket(0, 5)
+
+    def test_burst_is_served_without_waiting(self):
+        bucket = TokenBucket(1.0, 3)
+        t0 = time.perf_counter()
+        for _ in range(3):
+            bucket.acquire()
+        self.assertLess(time.perf_counter() - t0, 0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()